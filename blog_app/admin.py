@@ -40,6 +40,14 @@ class CommentAdmin(ModelAdmin):
     autocomplete_fields = ['post', 'author']
 
 
+@register(FeedEntry)
+class FeedEntryAdmin(ModelAdmin):
+    list_display = ['user', 'post', 'created_at']
+    search_fields = ['user__username', 'post__title']
+    list_per_page = 10
+    autocomplete_fields = ['user', 'post']
+
+
 @register(Subscriber)
 class SubscriberAdmin(ModelAdmin):
     list_display = ['blog', 'user', ]
@@ -0,0 +1,108 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.views import View
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .caching import not_modified_response, validator_headers
+from .pagination import KeysetPagination, fetch_rows
+from .views import BlogList, CommentList, PostDetail, PostList
+
+"""
+    This file contains the async (ASGI native) variants of the hot read endpoints, served under async/.
+    Each one mirrors a DRF view (view_class): authentication, permissions, queryset, filters, pagination
+    and serializer are the DRF view's, so both return the same responses.
+    Under ASGI the DRF views run whole in a worker thread; here only authentication, permissions and
+    filter validation (synchronous in DRF, they may read sessions, users or filtered rows) share one
+    thread hop, rows are read with the async ORM and serialization runs on the event loop.
+    Serializers must therefore only read prefetched relations: a lazy query raises SynchronousOnlyOperation.
+    Responses are not stored in the response cache, conditional requests are still answered.
+"""
+
+
+class AsyncReadView(View):
+    """
+    Mirrors the list view view_class: prepare runs its synchronous steps in one worker thread (and
+    may answer the request itself), read fetches a page with the async ORM and serializes it.
+    Detail views override both.
+    """
+    view_class = None
+    http_method_names = ['get', 'options']
+
+    def get_view(self, request, *args, **kwargs):
+        # the DRF view, set up as APIView.dispatch would
+        view = self.view_class(renderer_classes=[JSONRenderer])
+        view.setup(request, *args, **kwargs)
+        view.request = view.initialize_request(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+        return view
+
+    async def get(self, request, *args, **kwargs):
+        view = self.get_view(request, *args, **kwargs)
+        try:
+            response = await sync_to_async(self.prepare)(view)
+            if response is None:
+                response = await self.read(view)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        response = view.finalize_response(view.request, response)
+        return response.render() if isinstance(response, Response) else response
+
+    def prepare(self, view):
+        view.initial(view.request)
+        view.async_queryset = view.filter_queryset(view.get_queryset())
+
+    async def read(self, view):
+        # every list view paginates with KeysetPagination, whose plain limit/offset mode is LimitOffsetPagination's
+        paginator = view.paginator if isinstance(view.paginator, KeysetPagination) else KeysetPagination()
+        page = await paginator.apaginate_queryset(view.async_queryset, view.request, view)
+        data = view.get_serializer(page, many=True).data
+        return Response(paginator.get_paginated_data(data))
+
+
+class AsyncBlogList(AsyncReadView):
+    """
+    This view is the async variant of BlogList.
+    """
+    view_class = BlogList
+
+
+class AsyncPostList(AsyncReadView):
+    """
+    This view is the async variant of PostList.
+    """
+    view_class = PostList
+
+
+class AsyncCommentList(AsyncReadView):
+    """
+    This view is the async variant of CommentList.
+    """
+    view_class = CommentList
+
+
+class AsyncPostDetail(AsyncReadView):
+    """
+    This view is the async variant of PostDetail: PostDetail's version query and validators answer
+    conditional requests in the worker thread, then the post is read with its blog and tags.
+    """
+    view_class = PostDetail
+
+    def prepare(self, view):
+        view.initial(view.request)
+        if view.get_post_state(view.request) is None:
+            # missing or private post, PostDetail answers (404 or the private blog error)
+            return view.retrieve(view.request, *view.args, **view.kwargs)
+        view.async_validators = view.get_request_validators(view.request)
+
+    async def read(self, view):
+        not_modified = not_modified_response(view.request, *view.async_validators)
+        if not_modified is not None:
+            return not_modified
+        queryset = view.get_queryset().filter(pk=view.kwargs['pk'])
+        if 'tags' in view.get_serializer().fields:
+            queryset = queryset.prefetch_related('tags')
+        posts = await fetch_rows(queryset)
+        if not posts:
+            raise Http404
+        return Response(view.get_serializer(posts[0]).data, headers=validator_headers(*view.async_validators))
@@ -0,0 +1,317 @@
+import asyncio
+import datetime
+import json
+import random
+import statistics
+import uuid
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from blur.metrics import percentile
+from user_app.authentication import create_access_token, create_refresh_token
+from user_app.models import UserToken
+from .models import *
+from .seeding import TAG_NAMES, BlogSeeder, rich_html, sentence
+
+"""
+    This file contains the API benchmark harness used by the benchmark_api command:
+        - seed_dataset: a deterministic synthetic dataset (users, blogs with several authers, private blogs,
+          posts with rich HTML and tags, comment threads, likes, subscriptions ...), see blog_app/seeding.py
+        - endpoint_requests: requests exercising every URL of blog_app and user_app against that dataset
+        - measure: requests/sec, latency percentiles and query counts of one request
+        - compare: the differences with a saved baseline, and the regressions among them
+        - run_wsgi, run_asgi: concurrent requests to the WSGI or ASGI handler in process, as a server would send them
+"""
+
+# the user the requests are made as, and the password of every seeded user
+BENCH_READER = 'bench-reader'
+BENCH_PASSWORD = 'bench-password'
+
+BenchRequest = namedtuple('BenchRequest', 'label name method path data headers')
+
+
+def seed_dataset(users=30, blogs=8, posts=120, comments=6, likes=8, seed=1):
+    """
+    Seeds the benchmark dataset: the bulk of it with BlogSeeder, then, through the models' save methods,
+    the reader's own blog with posts and drafts, subscriptions (to a private blog too), a pending subscribe
+    request, saved posts, followed tags, a liked comment, a report, a series and a badge.
+    The same seed gives the same dataset.
+    """
+    seeder = BlogSeeder(
+        users=users, blogs=blogs, posts=posts, comments=comments, likes=likes, private_ratio=1 / 3, seed=seed, prefix='bench',
+    )
+    for progress in seeder.run():
+        pass
+    rng = random.Random(seed)
+    reader = User.objects.create_user(BENCH_READER, password=BENCH_PASSWORD)
+    blog = Blog.objects.create(
+        owner=reader, title=sentence(rng, 3), slug=f'bench-{seed}-reader', logo='blog/logos/bench.png', description=sentence(rng),
+    )
+    blog.authers.add(reader)
+    own_posts = []
+    for index in range(10):
+        post = Post(
+            blog=blog, author=reader, title=sentence(rng, 6), slug=f'bench-{seed}-reader-{index}', content=rich_html(rng),
+            is_published=index % 5 != 4,
+        )
+        post.save()
+        post.tags.add(*rng.sample(TAG_NAMES, 3))
+        own_posts.append(post)
+    series = Series.objects.create(blog=blog, title=sentence(rng, 3), slug=f'bench-{seed}-series')
+    series.posts.add(*own_posts[:5])
+
+    others = Blog.objects.exclude(owner=reader).order_by('pk')
+    private = list(others.filter(is_private=True)[:2])
+    for subscribed in list(others.filter(is_private=False)[:3]) + private[:1]:
+        Subscriber.objects.create(blog=subscribed, user=reader)
+    if len(private) > 1:
+        SubscribeRequest.objects.create(blog=private[1], user=reader)
+    public = list(Post.objects.filter(blog__is_private=False, is_published=True).exclude(blog=blog).order_by('pk')[:5])
+    for post in public:
+        SavedPost(post=post, user=reader).save()
+    for tag in Tag.objects.filter(name__in=TAG_NAMES[:3]):
+        FollowTag(tag=tag, user=reader).save()
+    comment = Comment.objects.filter(post__in=public).order_by('pk').first()
+    if comment is not None:
+        LikeComment(comment=comment, user=reader).save()
+    if public:
+        Report.objects.create(post=public[0], reporter=reader, report_type='spam', description=sentence(rng))
+    badge = Badge.objects.create(title='Bench', image='badges/bench.png')
+    UserBadge.objects.create(user=reader, badge=badge)
+    return reader
+
+
+def first_pk(queryset):
+    return queryset.order_by('pk').values_list('pk', flat=True).first()
+
+
+def endpoint_requests(reader):
+    """
+    Requests exercising the URLs of blog_app and user_app as the reader, with ids taken from the dataset.
+    Writes are idempotent (toggles, batches) or create throwaway rows (register, login).
+    URLs whose ids are missing from the dataset are left out.
+    """
+    public_posts = Post.objects.filter(blog__is_private=False, is_published=True, is_active=True)
+    post = first_pk(public_posts)
+    comment = first_pk(Comment.objects.filter(post_id=post, reply_to=None))
+    ids = {
+        'post': list(public_posts.order_by('pk').values_list('pk', flat=True)[:20]),
+        'comment': list(Comment.objects.filter(post__in=public_posts).order_by('pk').values_list('pk', flat=True)[:20]),
+        'tag': list(Tag.objects.order_by('pk').values_list('pk', flat=True)[:10]),
+    }
+    pks = {
+        'blog_detail': first_pk(Blog.objects.filter(is_private=False)),
+        'post_detail': post,
+        'comment_detail': comment,
+        'post_comments': post,
+        'comment_thread': comment,
+        'subscriber_detail': first_pk(Subscriber.objects.filter(user=reader)),
+        'subscription_toggle': first_pk(Blog.objects.filter(is_private=False)),
+        'subscribe_request_detail': first_pk(SubscribeRequest.objects.all()),
+        'like_toggle': post,
+        'like_comment_toggle': comment,
+        'saved_post_toggle': post,
+        'follow_tag_toggle': ids['tag'][0] if ids['tag'] else None,
+        'report_detail': first_pk(Report.objects.all()),
+        'series_detail': first_pk(Series.objects.all()),
+        'async_post_detail': post,
+    }
+    queries = {
+        'comments': f'post={post}',
+        'async_comments': f'post={post}',
+        'drafts': f'blog={first_pk(Blog.objects.filter(owner=reader))}',
+    }
+    batches = {'like_batch': 'post', 'like_comment_batch': 'comment', 'saved_post_batch': 'post', 'follow_tag_batch': 'tag'}
+    toggles = {'subscription_toggle', 'like_toggle', 'like_comment_toggle', 'saved_post_toggle', 'follow_tag_toggle'}
+
+    requests = []
+    for name in url_names('blog_app'):
+        if name in pks:
+            if pks[name] is None:
+                continue
+            path = reverse(f'blog_app:{name}', args=[pks[name]])
+        else:
+            path = reverse(f'blog_app:{name}')
+        if name in batches:
+            requests.append(BenchRequest(name, f'blog_app:{name}', 'post', path, {'ids': ids[batches[name]]}, {}))
+            continue
+        if name in toggles:
+            requests.append(BenchRequest(name, f'blog_app:{name}', 'put', path, None, {}))
+            continue
+        if name in queries:
+            path += '?' + queries[name]
+        requests.append(BenchRequest(name, f'blog_app:{name}', 'get', path, None, {}))
+        if name in ('posts', 'async_posts'):
+            requests.append(BenchRequest(f'{name} cursor', f'blog_app:{name}', 'get', path + '?cursor=', None, {}))
+        if name == 'posts':
+            requests.append(BenchRequest('posts search', 'blog_app:posts', 'get', path + '?search=django', None, {}))
+
+    refresh_token = create_refresh_token(reader.pk)
+    UserToken.objects.issue(reader.pk, refresh_token, timezone.now() + datetime.timedelta(days=7))
+    requests += [
+        BenchRequest('check', 'user_app:check', 'post', reverse('user_app:check'), {'username': BENCH_READER}, {}),
+        BenchRequest('register', 'user_app:register', 'post', reverse('user_app:register'), lambda number: {
+            'username': f'bench-new-{uuid.uuid4().hex[:12]}', 'first_name': 'Bench', 'last_name': 'User',
+            'password': BENCH_PASSWORD, 'password_confirm': BENCH_PASSWORD,
+        }, {}),
+        BenchRequest('login', 'user_app:login', 'post', reverse('user_app:login'), {'username': BENCH_READER, 'password': BENCH_PASSWORD}, {}),
+        BenchRequest('async_login', 'user_app:async_login', 'post', reverse('user_app:async_login'),
+                     {'username': BENCH_READER, 'password': BENCH_PASSWORD}, {}),
+        # access tokens are short-lived, a fresh one per request
+        BenchRequest('verify', 'user_app:verify', 'get', reverse('user_app:verify'), None,
+                     lambda number: {'HTTP_AUTHORIZATION': f'Bearer {create_access_token(reader)}'}),
+        BenchRequest('refresh', 'user_app:refresh', 'post', reverse('user_app:refresh'), None, {'HTTP_COOKIE': f'refresh_token={refresh_token}'}),
+        BenchRequest('logout', 'user_app:logout', 'post', reverse('user_app:logout'), None, {'HTTP_COOKIE': 'refresh_token=bench-unknown'}),
+    ]
+    return requests
+
+
+def url_names(namespace):
+    resolver = get_resolver().namespace_dict[namespace][1]
+    return [pattern.name for pattern in resolver.url_patterns if pattern.name]
+
+
+def uncovered_urls(requests):
+    # named URLs no benchmark request exercises, e.g. endpoints added since or missing dataset ids
+    covered = {request.name for request in requests}
+    return [f'{namespace}:{name}' for namespace in ('blog_app', 'user_app') for name in url_names(namespace)
+            if f'{namespace}:{name}' not in covered]
+
+
+def send(client, request, number):
+    data = request.data(number) if callable(request.data) else request.data
+    headers = request.headers(number) if callable(request.headers) else request.headers
+    if request.method == 'get':
+        return client.get(request.path, **headers)
+    return getattr(client, request.method)(request.path, json.dumps(data or {}), content_type='application/json', **headers)
+
+
+def measure(client, request, iterations=20, warmup=2):
+    for number in range(warmup):
+        send(client, request, number)
+    latencies, queries, statuses = [], [], Counter()
+    for number in range(iterations):
+        with CaptureQueriesContext(connection) as context:
+            start = perf_counter()
+            response = send(client, request, warmup + number)
+            latencies.append((perf_counter() - start) * 1000)
+        queries.append(len(context))
+        statuses[str(response.status_code)] += 1
+    return {
+        'method': request.method.upper(),
+        'path': request.path,
+        'requests': iterations,
+        'rps': round(iterations / (sum(latencies) / 1000), 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'queries': statistics.median_low(queries),
+        'queries_max': max(queries),
+        'statuses': dict(statuses),
+    }
+
+
+def benchmark_settings(with_cache=False):
+    # no debug query log; without the response cache every request reads the database
+    overrides = {'DEBUG': False}
+    if not with_cache:
+        overrides.update(
+            CACHES={**settings.CACHES, 'bench': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+            RESPONSE_CACHE='bench',
+        )
+    return override_settings(**overrides)
+
+
+def compare(results, baseline, threshold=0.25):
+    """
+    Differences between results and a baseline, per endpoint present in both:
+    (label, p95 change ratio, queries change, regressed), an endpoint regresses when it
+    makes more queries or its p95 latency grew by more than threshold.
+    """
+    rows = []
+    for label, current in results.items():
+        previous = baseline.get('endpoints', {}).get(label)
+        if previous is None:
+            continue
+        ratio = current['p95_ms'] / previous['p95_ms'] - 1 if previous['p95_ms'] else 0
+        queries = current['queries'] - previous['queries']
+        rows.append((label, ratio, queries, queries > 0 or ratio > threshold))
+    return rows
+
+
+def run_wsgi(handler, path, count, concurrency, method='GET', query='', headers=None, body=b''):
+    """
+    Sends count requests to a WSGI handler from a pool of concurrency threads (a threaded WSGI server).
+    headers are lower-case header names and values. Returns (seconds, latencies in ms, errors), errors
+    being the responses other than 2xx.
+    """
+    def request(_):
+        environ = {
+            'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': BytesIO(body), 'wsgi.url_scheme': 'http', 'wsgi.errors': BytesIO(),
+        }
+        for name, value in (headers or {}).items():
+            name = name.upper().replace('-', '_')
+            environ[name if name == 'CONTENT_TYPE' else f'HTTP_{name}'] = value
+        status = []
+        start = perf_counter()
+        b''.join(handler(environ, lambda code, response_headers: status.append(code)))
+        return (perf_counter() - start) * 1000, status[0].startswith('2')
+
+    start = perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(request, range(count)))
+    return perf_counter() - start, [latency for latency, _ in results], sum(not ok for _, ok in results)
+
+
+def run_asgi(handler, path, count, concurrency, method='GET', query='', headers=None, body=b''):
+    """
+    Sends count requests to an ASGI handler, at most concurrency at once on one event loop.
+    Same arguments and results as run_wsgi.
+    """
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method, 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'root_path': '', 'query_string': query.encode(),
+        'headers': [(b'host', b'localhost'), (b'content-length', str(len(body)).encode())] +
+                   [(name.encode(), value.encode()) for name, value in (headers or {}).items()],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+    }
+
+    async def request():
+        status = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        start = perf_counter()
+        await handler(dict(scope), receive, send)
+        return (perf_counter() - start) * 1000, 200 <= status[0] < 300
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited():
+            async with semaphore:
+                return await request()
+
+        start = perf_counter()
+        results = await asyncio.gather(*(limited() for _ in range(count)))
+        return perf_counter() - start, results
+
+    elapsed, results = asyncio.run(run())
+    return elapsed, [latency for latency, _ in results], sum(not ok for _, ok in results)
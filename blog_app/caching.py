@@ -0,0 +1,149 @@
+import hashlib
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+"""
+    This file contains the response cache of read endpoints.
+    Views using CachedResponseMixin store the serialized data of their GET responses in the
+    RESPONSE_CACHE cache, keyed on the view, its URL arguments, the normalized query parameters,
+    the visibility class of the viewer and the cache versions of what the response shows: a model
+    (any of its objects, for lists) or one object of a model (for details).
+    Saving or deleting an object bumps the versions of what shows it (see blog_app/signals.py), so stale
+    entries are never read again and simply expire.
+    Cached responses carry ETag and Last-Modified headers (only ETag for resources whose counters change
+    without their modified_at); matching conditional requests get a 304.
+    Views able to tell the version of their resource with a cheap query (get_validators) answer
+    conditional requests before the cache or the database row is read.
+"""
+
+
+def response_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE', 'default')]
+
+
+def version_key(model, pk=None):
+    label = model._meta.label_lower
+    return f'response-version:{label}' if pk is None else f'response-version:{label}:{pk}'
+
+
+def scope_keys(scopes):
+    # scopes are models or (model, pk) pairs
+    return [version_key(*scope) if isinstance(scope, tuple) else version_key(scope) for scope in scopes]
+
+
+def cache_versions(scopes):
+    keys = scope_keys(scopes)
+    versions = response_cache().get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = uuid.uuid4().hex
+            # another process may have set it meanwhile, its value wins
+            if not response_cache().add(key, versions[key], None):
+                versions[key] = response_cache().get(key, versions[key])
+    return [versions[key] for key in keys]
+
+
+def bump_cache_version(model, pk=None):
+    response_cache().set(version_key(model, pk), uuid.uuid4().hex, None)
+
+
+def bump_cache_versions(scopes):
+    response_cache().set_many({key: uuid.uuid4().hex for key in scope_keys(scopes)}, None)
+
+
+def bump_cache_versions_on_commit(scopes):
+    # bumped after commit, so a response rendered from uncommitted data is never cached under the new version
+    transaction.on_commit(lambda: bump_cache_versions(scopes))
+
+
+class CachedResponseMixin:
+    """
+    Caches GET responses of the view.
+    cache_models are the models whose changes invalidate the cached responses, get_cache_scopes may
+    narrow them to (model, pk) pairs of the objects the response shows;
+    get_visibility_class returns what the response depends on about the viewer
+    (None disables the cache for the request);
+    get_validators may return the (etag, last_modified timestamp or None) of the resource.
+    """
+    cache_models = ()
+
+    def get_cache_scopes(self, request):
+        return self.cache_models
+
+    def get_validators(self, request):
+        return None
+
+    def get_visibility_class(self, request):
+        # the data is the same for every viewer allowed by the permissions
+        return 'all'
+
+    def get_response_cache_key(self, request):
+        visibility = self.get_visibility_class(request)
+        if visibility is None:
+            return None
+        source = json.dumps([self.kwargs, normalized_params(request), visibility, cache_versions(self.get_cache_scopes(request))], sort_keys=True, default=str)
+        return f'response:{type(self).__name__}:{hashlib.md5(source.encode()).hexdigest()}'
+
+    def get_request_validators(self, request):
+        validators = self.get_validators(request)
+        # the representation also depends on the query parameters (e.g. sparse fields)
+        if validators is not None and request.query_params:
+            validators = make_etag(validators[0], normalized_params(request)), validators[1]
+        return validators
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_request_validators(request)
+        if validators is not None:
+            not_modified = not_modified_response(request, *validators)
+            if not_modified is not None:
+                return not_modified
+        key = self.get_response_cache_key(request)
+        entry = response_cache().get(key) if key else None
+        if entry is None:
+            response = super().get(request, *args, **kwargs)
+            if key is None or response.status_code != 200:
+                return response
+            content = json.dumps(response.data, sort_keys=True, default=str)
+            entry = {
+                'data': response.data,
+                'etag': make_etag(content),
+                'last_modified': int(time.time()),
+            }
+            response_cache().set(key, entry, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+        if validators is None:
+            validators = entry['etag'], entry['last_modified']
+            not_modified = not_modified_response(request, *validators)
+            if not_modified is not None:
+                return not_modified
+        return Response(entry['data'], headers=validator_headers(*validators))
+
+
+def normalized_params(request):
+    return sorted((name, sorted(values)) for name, values in request.query_params.lists())
+
+
+def validator_headers(etag, last_modified):
+    if last_modified is None:
+        return {'ETag': etag}
+    return {'ETag': etag, 'Last-Modified': http_date(last_modified)}
+
+
+def not_modified_response(request, etag, last_modified):
+    # a 304 response when the request's If-None-Match / If-Modified-Since match, otherwise None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        for name, value in validator_headers(etag, last_modified).items():
+            response.headers[name] = value
+    return response
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest())
@@ -0,0 +1,84 @@
+import math
+from html.parser import HTMLParser
+
+"""
+    This file contains the data derived from the HTML content of posts when they are saved,
+    so endpoints can show it without loading or parsing the content:
+    plain text (also the search text), excerpt, word count, reading time and image sources.
+    The content is parsed once per save, by a single pass of the standard library HTML parser.
+"""
+
+# maximum number of characters of post excerpts
+EXCERPT_LENGTH = 300
+
+# reading speed used for reading times
+WORDS_PER_MINUTE = 200
+
+
+class ContentParser(HTMLParser):
+    # collects the text and the image sources of an HTML fragment
+    skipped_tags = ('script', 'style')
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks = []
+        self.images = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.skipped_tags:
+            self.skipping += 1
+        elif tag == 'img':
+            src = dict(attrs).get('src')
+            if src:
+                self.images.append(src)
+
+    def handle_endtag(self, tag):
+        if tag in self.skipped_tags and self.skipping:
+            self.skipping -= 1
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.chunks.append(data)
+
+
+def parse_content(html):
+    parser = ContentParser()
+    parser.feed(html or '')
+    parser.close()
+    return parser
+
+
+def plain_text(html):
+    # text nodes separated by single spaces
+    return ' '.join(' '.join(parse_content(html).chunks).split())
+
+
+def content_images(html):
+    return parse_content(html).images
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    # the beginning of a plain text, cut at a word boundary
+    if len(text) <= length:
+        return text
+    head = text[:length + 1]
+    head = head.rsplit(' ', 1)[0] if ' ' in head else text[:length]
+    return head.rstrip(' ,.;:') + '…'
+
+
+def derive_content(html):
+    """
+    Returns the derived fields of Post for the given content:
+    search_text, excerpt, word_count, reading_time (minutes) and images (sources, in order).
+    """
+    parser = parse_content(html)
+    words = ' '.join(parser.chunks).split()
+    text = ' '.join(words)
+    return {
+        'search_text': text,
+        'excerpt': make_excerpt(text),
+        'word_count': len(words),
+        'reading_time': math.ceil(len(words) / WORDS_PER_MINUTE),
+        'images': parser.images,
+    }
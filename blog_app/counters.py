@@ -0,0 +1,68 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F, Func, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from taggit.models import TaggedItem
+
+from .models import *
+
+"""
+    This file contains the helpers that rebuild the denormalized counter columns
+    (Blog.posts_count, Blog.subscribers_count, Post.likes, Comment.likes,
+    Tag.posts_count, Tag.followers_count, Series.posts_count) from the source tables.
+    Model save/delete hooks keep the counters up to date with F() expressions;
+    these helpers reconcile drift (bulk deletes, cascades, raw SQL) in one UPDATE per counter.
+"""
+
+
+def count_subquery(queryset):
+    # correlated COUNT(*) over an outer-filtered queryset, usable in annotate/order_by/update
+    return Coalesce(Subquery(queryset.order_by().annotate(c=Func(F('pk'), function='COUNT')).values('c')), 0)
+
+
+def tagged_posts(tag_name):
+    # taggit items linking posts to the tag with the given name
+    return TaggedItem.objects.filter(tag__name=tag_name, content_type=ContentType.objects.get_for_model(Post))
+
+
+def recount_blogs(queryset=None):
+    queryset = Blog.objects.all() if queryset is None else queryset
+    return queryset.update(
+        posts_count=count_subquery(Post.objects.filter(blog=OuterRef('pk'))),
+        subscribers_count=count_subquery(Subscriber.objects.filter(blog=OuterRef('pk'))),
+    )
+
+
+def recount_posts(queryset=None):
+    queryset = Post.objects.all() if queryset is None else queryset
+    return queryset.update(likes=count_subquery(Like.objects.filter(post=OuterRef('pk'))))
+
+
+def recount_comments(queryset=None):
+    queryset = Comment.objects.all() if queryset is None else queryset
+    return queryset.update(likes=count_subquery(LikeComment.objects.filter(comment=OuterRef('pk'))))
+
+
+def recount_tags(queryset=None):
+    queryset = Tag.objects.all() if queryset is None else queryset
+    return queryset.update(
+        posts_count=count_subquery(tagged_posts(OuterRef('name'))),
+        followers_count=count_subquery(FollowTag.objects.filter(tag=OuterRef('pk'))),
+    )
+
+
+def recount_series(queryset=None):
+    queryset = Series.objects.all() if queryset is None else queryset
+    return queryset.update(
+        posts_count=count_subquery(Series.posts.through.objects.filter(series=OuterRef('pk')))
+    )
+
+
+def recount_all():
+    # returns the number of rows touched per model
+    return {
+        'blog': recount_blogs(),
+        'post': recount_posts(),
+        'comment': recount_comments(),
+        'tag': recount_tags(),
+        'series': recount_series(),
+    }
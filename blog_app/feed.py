@@ -0,0 +1,219 @@
+import datetime
+import heapq
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.utils.urls import replace_query_param
+from taggit.models import TaggedItem
+
+from .models import *
+from .pagination import KeysetPagination, keyset_filter
+
+"""
+    This file contains the home feed of users: posts of the blogs they subscribe to
+    and of the tags they follow.
+    When a post is published its id is fanned out on write into the feed inbox of every
+    subscriber of its blog and follower of its tags (FEED_STORE, a database table by default).
+    Blogs and tags with more than FEED_FANOUT_LIMIT subscribers/followers are skipped on
+    write; their posts are merged into the feed on read instead.
+    Feeds are read by (created_at, post id) keys, newest first: a page of keys from the inbox
+    (the FeedEntry timeline index) and from each big blog or tag source, merged, then the posts
+    of the newest keys by id.
+"""
+
+
+def fanout_limit():
+    return getattr(settings, 'FEED_FANOUT_LIMIT', 10000)
+
+
+def page_rounds():
+    return getattr(settings, 'FEED_PAGE_ROUNDS', 5)
+
+
+class DatabaseFeedStore:
+    # one FeedEntry row per (user, post), read with the (user, created_at) index
+    batch_size = 1000
+
+    def add(self, post, user_ids):
+        FeedEntry.objects.bulk_create(
+            [FeedEntry(user_id=user_id, post_id=post.pk, created_at=post.created_at) for user_id in user_ids],
+            batch_size=self.batch_size, ignore_conflicts=True,
+        )
+
+    def add_many(self, entries):
+        # (post, user ids) pairs in as few inserts as possible, for bulk loads
+        FeedEntry.objects.bulk_create(
+            [FeedEntry(user_id=user_id, post_id=post.pk, created_at=post.created_at) for post, user_ids in entries for user_id in user_ids],
+            batch_size=self.batch_size, ignore_conflicts=True,
+        )
+
+    def remove(self, user_id, post_ids):
+        FeedEntry.objects.filter(user_id=user_id, post_id__in=post_ids).delete()
+
+    def page(self, user_id, after, limit):
+        entries = FeedEntry.objects.filter(user_id=user_id)
+        if after is not None:
+            entries = entries.filter(keyset_filter(['-created_at', '-post_id'], after))
+        return list(entries.order_by('-created_at', '-post_id').values_list('created_at', 'post_id')[:limit])
+
+
+class CacheFeedStore:
+    """
+    Keeps the newest FEED_CACHE_SIZE post ids of every user in a cache (FEED_CACHE alias),
+    for deployments with a shared cache server. Updates are read-modify-write, so
+    concurrent fan-outs to the same user may drop an entry.
+    """
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'FEED_CACHE', 'default')]
+        self.size = getattr(settings, 'FEED_CACHE_SIZE', 500)
+
+    def key(self, user_id):
+        return f'feed:{user_id}'
+
+    def add(self, post, user_ids):
+        keys = {self.key(user_id): user_id for user_id in user_ids}
+        inboxes = self.cache.get_many(keys)
+        entry = (post.created_at.timestamp(), post.pk)
+        updated = {}
+        for key in keys:
+            inbox = inboxes.get(key, [])
+            if entry not in inbox:
+                updated[key] = sorted(inbox + [entry], reverse=True)[:self.size]
+        self.cache.set_many(updated, timeout=None)
+
+    def add_many(self, entries):
+        for post, user_ids in entries:
+            self.add(post, user_ids)
+
+    def remove(self, user_id, post_ids):
+        post_ids = set(post_ids)
+        inbox = self.cache.get(self.key(user_id), [])
+        self.cache.set(self.key(user_id), [entry for entry in inbox if entry[1] not in post_ids], timeout=None)
+
+    def page(self, user_id, after, limit):
+        keys = (
+            (datetime.datetime.fromtimestamp(created_at, tz=datetime.timezone.utc), post_id)
+            for created_at, post_id in self.cache.get(self.key(user_id), [])
+        )
+        return [key for key in keys if after is None or key < after][:limit]
+
+
+def get_feed_store():
+    return import_string(getattr(settings, 'FEED_STORE', 'blog_app.feed.DatabaseFeedStore'))()
+
+
+def is_feed_post(post):
+    return post.is_published and post.is_active
+
+
+def fan_out_to_subscribers(post):
+    if Blog.objects.filter(pk=post.blog_id, subscribers_count__gt=fanout_limit()).exists():
+        return
+    user_ids = Subscriber.objects.filter(blog_id=post.blog_id).values_list('user_id', flat=True)
+    get_feed_store().add(post, user_ids.iterator())
+
+
+def fan_out_to_tag_followers(post, tag_names):
+    user_ids = FollowTag.objects.filter(
+        tag__name__in=tag_names, tag__followers_count__lte=fanout_limit()
+    ).values_list('user_id', flat=True).distinct()
+    get_feed_store().add(post, user_ids.iterator())
+
+
+def remove_blog_from_feed(user_id, blog_id):
+    # posts the user still gets through a followed tag stay
+    followed = FollowTag.objects.filter(user_id=user_id).values('tag__name')
+    tagged = TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Post), tag__name__in=followed)
+    post_ids = Post.objects.filter(blog_id=blog_id).exclude(id__in=tagged.values('object_id')).values_list('pk', flat=True)
+    get_feed_store().remove(user_id, list(post_ids))
+
+
+def feed_posts(user):
+    # posts that may be shown in the user's feed
+    return Post.objects.filter(is_active=True, is_published=True, blog__is_active=True).visible_to(user)
+
+
+def feed_sources(user):
+    """
+    Functions of (after, limit) returning the newest keys of a source of the user's feed: the inbox,
+    and the published posts of the subscribed blogs and followed tags too big for fan-out, if any.
+    """
+    store, limit = get_feed_store(), fanout_limit()
+    sources = [lambda after, count: store.page(user.pk, after, count)]
+    published = Post.objects.filter(is_active=True, is_published=True)
+    big_blogs = list(Subscriber.objects.filter(user_id=user.pk, blog__subscribers_count__gt=limit).values_list('blog_id', flat=True))
+    if big_blogs:
+        sources.append(lambda after, count: post_keys(published.filter(blog_id__in=big_blogs), after, count))
+    big_tags = list(FollowTag.objects.filter(user_id=user.pk, tag__followers_count__gt=limit).values_list('tag__name', flat=True))
+    if big_tags:
+        tagged = TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Post), tag__name__in=big_tags)
+        sources.append(lambda after, count: post_keys(published.filter(id__in=tagged.values('object_id')), after, count))
+    return sources
+
+
+def post_keys(posts, after, limit):
+    # read with the newest-first published post indexes
+    if after is not None:
+        posts = posts.filter(keyset_filter(['-created_at', '-id'], after))
+    return list(posts.order_by('-created_at', '-id').values_list('created_at', 'id')[:limit])
+
+
+def newest_keys(sources, after, limit):
+    # the newest keys of all sources after the cursor, each post once
+    keys, seen = [], set()
+    for key in heapq.merge(*(source(after, limit) for source in sources), reverse=True):
+        if key[1] not in seen:
+            seen.add(key[1])
+            keys.append(key)
+            if len(keys) == limit:
+                break
+    return keys
+
+
+def feed_page(user, posts, limit, after=None):
+    """
+    The posts of a page of the user's feed after the (created_at, id) cursor, and the key the next page
+    starts after (None at the end of the feed).
+    posts is the queryset rows are read from by id (see feed_posts); keys of posts it does not
+    return (unpublished since, deactivated, private) are skipped and the next keys read, in at most
+    FEED_PAGE_ROUNDS rounds: past them the page is returned short, its cursor after the last key read.
+    """
+    sources = feed_sources(user)
+    rows = []
+    for _ in range(page_rounds()):
+        count = limit + 1 - len(rows)
+        keys = newest_keys(sources, after, count)
+        found = posts.in_bulk([post_id for created_at, post_id in keys])
+        rows += [found[post_id] for created_at, post_id in keys if post_id in found]
+        if len(rows) > limit:
+            return rows[:limit], (rows[limit - 1].created_at, rows[limit - 1].pk)
+        if len(keys) < count:
+            return rows, None
+        after = keys[-1]
+    return rows, after
+
+
+class FeedPagination(KeysetPagination):
+    """
+    Home feeds are only read by cursor, newest first, and have no count. Pages are read from the
+    user's feed sources, the paginated queryset only gives the readable posts.
+    """
+    keyset_only = True
+    ordering = ['-created_at', '-id']
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keyset, self.with_count = True, False
+        self.limit = self.get_limit(request)
+        values = self.decode_cursor(request, queryset.model)
+        self.page, self.next_key = feed_page(request.user, queryset, self.limit, tuple(values) if values else None)
+        self.has_next = self.next_key is not None
+        return self.page
+
+    def get_next_link(self):
+        # after the last key read, which is not the last post of the page when unreadable posts were skipped
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.encode_values(self.next_key))
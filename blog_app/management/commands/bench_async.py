@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from blog_app.benchmark import benchmark_settings, run_asgi, run_wsgi
+from blog_app.models import Post
+from blur.metrics import percentile
+
+"""
+    This file contains the benchmark of the async read endpoints (blog_app/async_views.py).
+    Every endpoint is requested in three ways, in process and without network:
+        - wsgi: the sync view through the WSGI handler, from a pool of threads (a threaded WSGI server)
+        - asgi-sync: the sync view through the ASGI handler, concurrent requests on one event loop
+        - asgi-async: the async variant through the ASGI handler
+    and the throughput and latency percentiles of each are reported.
+    The response cache is disabled unless --with-cache is given, so every request reads the database.
+"""
+
+# (sync URL name, async URL name), detail endpoints take the id of a public post
+ENDPOINTS = [
+    ('blog_app:posts', 'blog_app:async_posts'),
+    ('blog_app:post_detail', 'blog_app:async_post_detail'),
+    ('blog_app:comments', 'blog_app:async_comments'),
+    ('blog_app:blogs', 'blog_app:async_blogs'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare the throughput of sync views under WSGI and ASGI with their async variants.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='username the requests are made as')
+        parser.add_argument('--requests', type=int, default=200, help='requests per endpoint and mode')
+        parser.add_argument('--concurrency', type=int, default=10, help='requests in flight')
+        parser.add_argument('--query', default='', help='query string added to list endpoints, e.g. limit=50')
+        parser.add_argument('--with-cache', action='store_true', help='keep the response cache enabled')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f'No user {options["user"]}')
+        client = Client()
+        client.force_login(user)
+        headers = {'cookie': f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'}
+        post = Post.objects.filter(is_active=True, is_published=True, blog__is_private=False).order_by('-id').first()
+
+        with benchmark_settings(options['with_cache']):
+            wsgi, asgi = WSGIHandler(), ASGIHandler()
+            self.stdout.write(f"{'endpoint':<28} {'mode':<11} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+            for sync_name, async_name in ENDPOINTS:
+                if 'detail' in sync_name:
+                    if post is None:
+                        self.stdout.write(f'{sync_name:<28} skipped, no public post')
+                        continue
+                    sync_path, async_path, query = reverse(sync_name, args=[post.pk]), reverse(async_name, args=[post.pk]), ''
+                else:
+                    sync_path, async_path, query = reverse(sync_name), reverse(async_name), options['query']
+                runs = [
+                    ('wsgi', run_wsgi, wsgi, sync_path),
+                    ('asgi-sync', run_asgi, asgi, sync_path),
+                    ('asgi-async', run_asgi, asgi, async_path),
+                ]
+                for mode, run, handler, path in runs:
+                    elapsed, latencies, errors = run(
+                        handler, path, options['requests'], options['concurrency'], query=query, headers=headers,
+                    )
+                    self.stdout.write(
+                        f'{sync_name:<28} {mode:<11} {len(latencies) / elapsed:>8.1f} {percentile(latencies, 50):>8.1f} '
+                        f'{percentile(latencies, 95):>8.1f} {percentile(latencies, 99):>8.1f} {errors:>7}'
+                    )
@@ -0,0 +1,98 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.utils import timezone
+
+from blog_app.benchmark import (BENCH_READER, benchmark_settings, compare, endpoint_requests, measure,
+                                seed_dataset, uncovered_urls)
+
+
+class Command(BaseCommand):
+    help = ('Seed a synthetic dataset in a test database and report requests/sec, latency percentiles and '
+            'query counts of every API endpoint, optionally against a saved baseline.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=30)
+        parser.add_argument('--blogs', type=int, default=8)
+        parser.add_argument('--posts', type=int, default=120)
+        parser.add_argument('--comments', type=int, default=6, help='comments per post, on average')
+        parser.add_argument('--likes', type=int, default=8, help='likes per post, on average')
+        parser.add_argument('--seed', type=int, default=1, help='random seed of the dataset')
+        parser.add_argument('--iterations', type=int, default=20, help='measured requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=2, help='unmeasured requests per endpoint')
+        parser.add_argument('--endpoint', action='append', default=[], help='only endpoints whose label contains this (repeatable)')
+        parser.add_argument('--with-cache', action='store_true', help='keep the response cache enabled')
+        parser.add_argument('--keepdb', action='store_true', help='keep the test database and its dataset for the next run')
+        parser.add_argument('--save', help='write the results to this JSON file')
+        parser.add_argument('--baseline', help='compare with the results saved in this JSON file')
+        parser.add_argument('--threshold', type=float, default=0.25, help='p95 latency growth reported as a regression')
+        parser.add_argument('--fail-on-regression', action='store_true', help='exit with an error when an endpoint regressed')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)
+        # the dataset lives in the test database of the configured one (SQLite or PostgreSQL)
+        runner = DiscoverRunner(verbosity=0, keepdb=options['keepdb'])
+        runner.setup_test_environment()
+        databases = runner.setup_databases()
+        try:
+            with benchmark_settings(options['with_cache']):
+                results = self.run(options)
+        finally:
+            runner.teardown_databases(databases)
+            runner.teardown_test_environment()
+
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump({
+                    'created_at': timezone.now().isoformat(),
+                    'database': connection.vendor,
+                    'dataset': {name: options[name] for name in ('users', 'blogs', 'posts', 'comments', 'likes', 'seed')},
+                    'iterations': options['iterations'],
+                    'endpoints': results,
+                }, file, indent=2)
+            self.stdout.write(f'results saved to {options["save"]}')
+        if baseline is not None:
+            self.report_changes(results, baseline, options)
+
+    def run(self, options):
+        reader = User.objects.filter(username=BENCH_READER).first()
+        if reader is None:
+            self.stdout.write('seeding the dataset ...')
+            reader = seed_dataset(**{name: options[name] for name in ('users', 'blogs', 'posts', 'comments', 'likes', 'seed')})
+        client = Client()
+        client.force_login(reader)
+        requests = endpoint_requests(reader)
+        for name in uncovered_urls(requests):
+            self.stdout.write(self.style.WARNING(f'not benchmarked: {name}'))
+        if options['endpoint']:
+            requests = [request for request in requests if any(part in request.label for part in options['endpoint'])]
+
+        results = {}
+        self.stdout.write(f"{'endpoint':<26} {'method':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>7} statuses")
+        for request in requests:
+            stats = results[request.label] = measure(client, request, options['iterations'], options['warmup'])
+            statuses = ' '.join(f'{status}x{count}' for status, count in sorted(stats['statuses'].items()))
+            self.stdout.write(
+                f"{request.label:<26} {stats['method']:<6} {stats['rps']:>8.1f} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+                f"{stats['p99_ms']:>8.2f} {stats['queries']:>7} {statuses}"
+            )
+        return results
+
+    def report_changes(self, results, baseline, options):
+        rows = compare(results, baseline, options['threshold'])
+        self.stdout.write(f"\n{'endpoint':<26} {'p95':>8} {'queries':>8}")
+        regressions = []
+        for label, ratio, queries, regressed in rows:
+            line = f'{label:<26} {ratio:>+8.0%} {queries:>+8}'
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+            if regressed:
+                regressions.append(label)
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} endpoints regressed: {", ".join(regressions)}')
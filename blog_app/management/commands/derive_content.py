@@ -0,0 +1,77 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog_app.caching import bump_cache_version, bump_cache_versions
+from blog_app.content import derive_content
+from blog_app.models import Post
+from blog_app.search import index_posts
+
+# fields written by the command, see blog_app/content.py
+DERIVED_FIELDS = ['search_text', 'excerpt', 'word_count', 'reading_time', 'images']
+
+
+def derive_batch(rows):
+    # runs in the worker processes: pure parsing, no database access
+    return [(pk, derive_content(content)) for pk, content in rows]
+
+
+class Command(BaseCommand):
+    help = ('Recompute the fields derived from the content of every post (plain text, excerpt, word count, '
+            'reading time, images) and refresh their search index.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='parsing processes, 0 parses in this process')
+
+    def handle(self, *args, **options):
+        rows = Post.objects.order_by('pk').values_list('pk', 'content').iterator(chunk_size=options['batch_size'])
+        batches = self.batches(rows, options['batch_size'])
+        done = 0
+        if options['workers'] == 0:
+            for batch in batches:
+                done += self.save(derive_batch(batch))
+        else:
+            with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+                # at most two batches per worker in flight, so posts are streamed instead of read all at once
+                pending = []
+                for batch in batches:
+                    pending.append(executor.submit(derive_batch, batch))
+                    if len(pending) >= 2 * options['workers']:
+                        done += self.save(pending.pop(0).result())
+                for future in pending:
+                    done += self.save(future.result())
+        bump_cache_version(Post)
+        self.stdout.write(self.style.SUCCESS(f'{done} posts processed'))
+
+    def batches(self, rows, size):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def save(self, results):
+        posts = {}
+        for pk, derived in results:
+            post = posts[pk] = Post(pk=pk)
+            for name in DERIVED_FIELDS:
+                setattr(post, name, derived[name])
+        # the search index is built from the title, the tags and the new plain text
+        tag_names = {}
+        for pk, title, name in Post.objects.filter(pk__in=posts).values_list('pk', 'title', 'tags__name'):
+            posts[pk].title = title
+            if name is not None:
+                tag_names.setdefault(pk, []).append(name)
+        posts = list(posts.values())
+        with transaction.atomic():
+            Post.objects.bulk_update(posts, DERIVED_FIELDS)
+            index_posts(posts, tag_names)
+        bump_cache_versions([(Post, post.pk) for post in posts])
+        return len(posts)
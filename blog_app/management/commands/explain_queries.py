@@ -0,0 +1,130 @@
+import json
+import re
+from collections import OrderedDict
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+"""
+    This file contains the index advisor. It runs captured SELECT statements through EXPLAIN and reports full table scans,
+    sorts without an index, and the filtered columns of scanned tables that no index starts with.
+    Queries come from log files (JSON lines or a JSON list of strings or {"sql": ...} objects, as
+    written by CaptureQueriesContext) or are captured on the spot by requesting --url paths.
+"""
+
+# literals and parameter lists, replaced to group statements that only differ by their values
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LISTS = re.compile(r'IN \((?:\?, )*\?\)')
+
+
+def normalize(sql):
+    return IN_LISTS.sub('IN (...)', LITERALS.sub('?', sql))
+
+
+def filtered_columns(sql, table):
+    # columns of the table used in the WHERE clause, in order of appearance
+    where = sql.split(' WHERE ', 1)[1] if ' WHERE ' in sql else ''
+    where = re.split(r' (?:GROUP BY|ORDER BY|LIMIT) ', where)[0]
+    columns = re.findall(rf'"{re.escape(table)}"\."(\w+)"', where)
+    return list(OrderedDict.fromkeys(columns))
+
+
+class Command(BaseCommand):
+    help = 'Explain captured queries and report sequential scans and missing indexes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('logs', nargs='*', help='query log files')
+        parser.add_argument('--url', action='append', default=[], help='GET this path and explain its queries (repeatable)')
+        parser.add_argument('--user', help='username the --url requests are made as')
+        parser.add_argument('--min-rows', type=int, default=0,
+                            help='ignore scans the planner estimates below this many rows (PostgreSQL)')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'EXPLAIN output of {connection.vendor} is not supported')
+        statements = OrderedDict()
+        for sql in self.read_logs(options['logs']) + self.capture(options['url'], options['user']):
+            if sql.lstrip().upper().startswith('SELECT'):
+                statements.setdefault(normalize(sql), [sql, 0])[1] += 1
+        if not statements:
+            raise CommandError('No SELECT statements to explain, give query logs or --url paths')
+
+        self.indexes = {}
+        reported = 0
+        for shape, (sql, count) in statements.items():
+            problems = self.explain(sql, options['min_rows'])
+            if not problems:
+                continue
+            reported += 1
+            self.stdout.write(self.style.WARNING(f'{count}x {shape[:300]}'))
+            for problem in problems:
+                self.stdout.write(f'    {problem}')
+        self.stdout.write(self.style.SUCCESS(f'{len(statements)} distinct statements explained, {reported} with problems'))
+
+    def read_logs(self, paths):
+        queries = []
+        for path in paths:
+            with open(path) as log:
+                text = log.read().strip()
+            entries = json.loads(text) if text.startswith('[') else [json.loads(line) for line in text.splitlines() if line.strip()]
+            queries += [entry['sql'] if isinstance(entry, dict) else entry for entry in entries]
+        return queries
+
+    def capture(self, urls, username):
+        if not urls:
+            return []
+        client = Client()
+        if username:
+            client.force_login(User.objects.get(username=username))
+        with CaptureQueriesContext(connection) as context:
+            for url in urls:
+                response = client.get(url)
+                self.stdout.write(f'GET {url}: {response.status_code}')
+        return [query['sql'] for query in context.captured_queries]
+
+    def explain(self, sql, min_rows):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+                plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan']
+                return self.postgresql_problems(sql, plan, min_rows)
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return self.sqlite_problems(sql, [row[-1] for row in cursor.fetchall()])
+
+    def postgresql_problems(self, sql, plan, min_rows):
+        problems = []
+        if plan['Node Type'] == 'Seq Scan' and plan.get('Plan Rows', 0) >= min_rows:
+            problems.append(f"sequential scan of {plan['Relation Name']} (~{plan.get('Plan Rows')} rows)")
+            problems += self.missing_index(sql, plan['Relation Name'])
+        if plan['Node Type'] == 'Sort':
+            problems.append(f"sort on {', '.join(plan.get('Sort Key', []))} without an index")
+        for child in plan.get('Plans', []):
+            problems += self.postgresql_problems(sql, child, min_rows)
+        return problems
+
+    def sqlite_problems(self, sql, details):
+        problems = []
+        for detail in details:
+            scan = re.match(r'SCAN (?:TABLE )?(\w+)(?: AS \w+)?$', detail)
+            if scan:
+                problems.append(f'full scan of {scan.group(1)}')
+                problems += self.missing_index(sql, scan.group(1))
+            elif detail.startswith('USE TEMP B-TREE'):
+                problems.append(detail.lower().replace('use temp b-tree', 'sort').strip() + ' without an index')
+        return problems
+
+    def missing_index(self, sql, table):
+        columns = filtered_columns(sql, table)
+        if not columns:
+            return []
+        if table not in self.indexes:
+            with connection.cursor() as cursor:
+                constraints = connection.introspection.get_constraints(cursor, table)
+            self.indexes[table] = [c['columns'] for c in constraints.values() if c['index'] or c['unique'] or c['primary_key']]
+        if any(index and index[0] in columns for index in self.indexes[table]):
+            return []
+        return [f"no index starts with a filtered column, consider an index on {table}({', '.join(columns)})"]
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blur.metrics import read_metrics, summarize
+
+
+class Command(BaseCommand):
+    help = 'Aggregate the request metrics log (QUERY_METRICS_LOG) per URL name: latency percentiles, queries, DB and render time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('log', nargs='?', help='metrics log, QUERY_METRICS_LOG by default')
+        parser.add_argument('--sort', default='total_p95',
+                            choices=['requests', 'total_p50', 'total_p95', 'total_p99', 'queries_p95', 'queries_max', 'db_p95'])
+        parser.add_argument('--path', action='store_true', help='aggregate per path instead of URL name')
+
+    def handle(self, *args, **options):
+        path = options['log'] or getattr(settings, 'QUERY_METRICS_LOG', None)
+        if not path:
+            raise CommandError('Give a metrics log or set QUERY_METRICS_LOG')
+        key = (lambda record: (record['path'], record['method'])) if options['path'] else None
+        rows = summarize(read_metrics(path), **({'key': key} if key else {}))
+        rows.sort(key=lambda row: row[options['sort']] or 0, reverse=True)
+        header = f"{'endpoint':<40} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'q p50':>6} {'q p95':>6} {'q max':>6} {'db p95':>8} {'rnd p95':>8} {'bytes':>8}"
+        self.stdout.write(header)
+        for row in rows:
+            name = f'{row["key"][1]} {row["key"][0]}'
+            self.stdout.write(
+                f"{name[:40]:<40} {row['requests']:>6} {row['total_p50']:>8.1f} {row['total_p95']:>8.1f} {row['total_p99']:>8.1f} "
+                f"{row['queries_p50']:>6} {row['queries_p95']:>6} {row['queries_max']:>6} {row['db_p95']:>8.1f} "
+                f"{row['render_p95']:>8.1f} {row['bytes_p50'] or 0:>8}"
+            )
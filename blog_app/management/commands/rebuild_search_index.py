@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog_app.content import plain_text
+from blog_app.models import Post
+from blog_app.search import update_post_index
+
+
+class Command(BaseCommand):
+    help = 'Extract the plain text of every post and rebuild the post full-text search index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = Post.objects.prefetch_related('tags').order_by('pk')
+        batch, done = [], 0
+        for post in posts.iterator(chunk_size=batch_size):
+            post.search_text = plain_text(post.content)
+            batch.append(post)
+            if len(batch) == batch_size:
+                done += self.index(batch)
+                batch = []
+        done += self.index(batch)
+        self.stdout.write(self.style.SUCCESS(f'{done} posts indexed'))
+
+    def index(self, posts):
+        with transaction.atomic():
+            Post.objects.bulk_update(posts, ['search_text'])
+            for post in posts:
+                update_post_index(post, tag_names=[tag.name for tag in post.tags.all()])
+        return len(posts)
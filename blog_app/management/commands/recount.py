@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog_app.counters import recount_all
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized counter columns (likes, posts and subscribers counts) from the source tables.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            touched = recount_all()
+        for model, rows in touched.items():
+            self.stdout.write(f'{model}: {rows} rows recounted')
+        self.stdout.write(self.style.SUCCESS('Counters are up to date'))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog_app.seeding import BlogSeeder
+
+
+class Command(BaseCommand):
+    help = ('Generate a large synthetic dataset (users, blogs, posts, comments, likes, subscribers) with bulk inserts '
+            'in streamed batches, keeping tags, counters, search index and feeds consistent.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--blogs', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=5, help='comments per post, on average')
+        parser.add_argument('--likes', type=int, default=10, help='likes per post, on average')
+        parser.add_argument('--subscribers', type=int, default=20, help='subscribers per blog, on average')
+        parser.add_argument('--follows', type=int, default=2, help='followed tags per user, on average')
+        parser.add_argument('--authers', type=int, default=3, help='authers per blog besides the owner')
+        parser.add_argument('--private-ratio', type=float, default=0.2)
+        parser.add_argument('--draft-ratio', type=float, default=0.1)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=1, help='random seed, the same seed generates the same data')
+        parser.add_argument('--prefix', default='seed', help='prefix of generated usernames and slugs, must be new in the database')
+
+    def handle(self, *args, **options):
+        seeder = BlogSeeder(**{name: options[name] for name in (
+            'users', 'blogs', 'posts', 'comments', 'likes', 'subscribers', 'follows', 'authers',
+            'private_ratio', 'draft_ratio', 'batch_size', 'seed', 'prefix',
+        )})
+        started = time.perf_counter()
+        stage_started, stage, done = started, None, {}
+        for name, count, total in seeder.run():
+            if name in ('users', 'blogs', 'posts') and name != stage:
+                stage, stage_started = name, time.perf_counter()
+            done[name] = count
+            rate = count / max(time.perf_counter() - stage_started, 1e-6)
+            self.stdout.write(f'{name:<9} {count:>10}/{total:<10} {rate:>10.0f} rows/s', ending='\r' if self.stdout.isatty() else '\n')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(' ' * 50, ending='\r' if self.stdout.isatty() else '')
+        rows = sum(done.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{', '.join(f'{count} {name}' for name, count in done.items())} in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)"
+        ))
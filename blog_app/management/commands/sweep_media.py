@@ -0,0 +1,49 @@
+import datetime
+import os
+
+from ckeditor_uploader.utils import get_thumb_filename
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog_app.media import delete_uploads, referenced_uploads
+from blog_app.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Delete files of the CKEditor upload folder that no post references anymore.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=float, default=24,
+                            help='only delete files older than this many hours (uploads of posts being written are kept)')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        referenced = set()
+        for content in Post.objects.values_list('content', flat=True).iterator(chunk_size=options['batch_size']):
+            for name in referenced_uploads(content):
+                referenced.update((name, get_thumb_filename(name)))
+
+        cutoff = timezone.now() - datetime.timedelta(hours=options['min_age'])
+        orphans = [
+            name for name in self.walk(settings.CKEDITOR_UPLOAD_PATH)
+            if name not in referenced and default_storage.get_modified_time(name) < cutoff
+        ]
+        for name in orphans:
+            self.stdout.write(name)
+        if not options['dry_run']:
+            for start in range(0, len(orphans), options['batch_size']):
+                delete_uploads(orphans[start:start + options['batch_size']])
+        action = 'found' if options['dry_run'] else 'deleted'
+        self.stdout.write(self.style.SUCCESS(f'{len(orphans)} orphaned files {action}, {len(referenced)} referenced'))
+
+    def walk(self, path):
+        if not default_storage.exists(path):
+            return
+        directories, files = default_storage.listdir(path)
+        for name in files:
+            yield os.path.join(path, name)
+        for directory in directories:
+            yield from self.walk(os.path.join(path, directory))
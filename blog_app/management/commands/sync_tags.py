@@ -0,0 +1,29 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from taggit.models import TaggedItem
+
+from blog_app.counters import recount_tags
+from blog_app.models import Post, Tag
+
+
+class Command(BaseCommand):
+    help = 'Create the blog tags missing for the tag names used on posts (taggit tables) and recount tag counters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        names = TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Post)
+        ).values_list('tag__name', flat=True).distinct().order_by('tag__name')
+        created, batch = 0, []
+        with transaction.atomic():
+            for name in names.iterator(chunk_size=options['batch_size']):
+                batch.append(name)
+                if len(batch) == options['batch_size']:
+                    created += len(Tag.objects.ensure(batch))
+                    batch = []
+            created += len(Tag.objects.ensure(batch))
+            recounted = recount_tags()
+        self.stdout.write(self.style.SUCCESS(f'{created} tags created, {recounted} tags recounted'))
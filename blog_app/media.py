@@ -0,0 +1,97 @@
+import logging
+import queue
+import threading
+from urllib.parse import unquote, urlsplit
+
+from ckeditor_uploader.utils import get_thumb_filename
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .content import content_images
+
+"""
+    This file contains the garbage collection of uploaded media.
+    Saving or deleting posts and blogs hands the upload paths they stopped referencing
+    to discard_media; after the transaction commits, a background worker thread deletes
+    them (and their CKEditor thumbnails) from storage in batches.
+    The sweep_media command reconciles the CKEditor upload folder against the paths
+    referenced by all posts, for files missed by the worker.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def upload_name(src):
+    # storage name of a media URL, None for URLs outside MEDIA_URL
+    path = unquote(urlsplit(src).path)
+    if not path.startswith(settings.MEDIA_URL):
+        return None
+    return path[len(settings.MEDIA_URL):] or None
+
+
+def upload_names(sources):
+    names = (upload_name(src) for src in sources)
+    return {name for name in names if name}
+
+
+def referenced_uploads(html):
+    return upload_names(content_images(html))
+
+
+def delete_uploads(names):
+    for name in names:
+        for path in (name, get_thumb_filename(name)):
+            try:
+                if default_storage.exists(path):
+                    default_storage.delete(path)
+            except Exception:
+                logger.exception('Could not delete media file %s', path)
+
+
+class MediaCollector:
+    # a single daemon thread deleting queued storage names, up to batch_size per storage pass
+    def __init__(self, batch_size=100):
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def enqueue(self, names):
+        for name in names:
+            self.queue.put(name)
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='media-collector', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                delete_uploads(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def flush(self):
+        # waits until every queued name has been handled
+        self.queue.join()
+
+
+collector = MediaCollector(batch_size=getattr(settings, 'MEDIA_GC_BATCH_SIZE', 100))
+
+
+def discard_media(names):
+    names = [name for name in names if name]
+    if not names:
+        return
+    if getattr(settings, 'MEDIA_GC_SYNC', False):
+        transaction.on_commit(lambda: delete_uploads(names))
+    else:
+        transaction.on_commit(lambda: collector.enqueue(names))
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.3 on 2026-10-18 20:32
+
+from django.db import migrations, models
+from django.db.models import F, Func, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset):
+    return Coalesce(Subquery(queryset.order_by().annotate(c=Func(F('pk'), function='COUNT')).values('c')), 0)
+
+
+def fill_counters(apps, schema_editor):
+    Blog = apps.get_model('blog_app', 'Blog')
+    Post = apps.get_model('blog_app', 'Post')
+    Comment = apps.get_model('blog_app', 'Comment')
+    Tag = apps.get_model('blog_app', 'Tag')
+    Series = apps.get_model('blog_app', 'Series')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    Blog.objects.update(
+        posts_count=count_subquery(Post.objects.filter(blog=OuterRef('pk'))),
+        subscribers_count=count_subquery(apps.get_model('blog_app', 'Subscriber').objects.filter(blog=OuterRef('pk'))),
+    )
+    Post.objects.update(likes=count_subquery(apps.get_model('blog_app', 'Like').objects.filter(post=OuterRef('pk'))))
+    Comment.objects.update(likes=count_subquery(apps.get_model('blog_app', 'LikeComment').objects.filter(comment=OuterRef('pk'))))
+    Tag.objects.update(
+        posts_count=count_subquery(TaggedItem.objects.filter(
+            tag__name=OuterRef('name'), content_type__app_label='blog_app', content_type__model='post',
+        )),
+        followers_count=count_subquery(apps.get_model('blog_app', 'FollowTag').objects.filter(tag=OuterRef('pk'))),
+    )
+    Series.objects.update(posts_count=count_subquery(Series.posts.through.objects.filter(series=OuterRef('pk'))))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0020_post_is_published'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0005_auto_20220424_2025'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='posts_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='subscribers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='likes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='series',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='posts_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
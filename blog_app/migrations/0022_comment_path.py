@@ -0,0 +1,44 @@
+# Generated by Django 4.2.3 on 2026-10-18 20:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_comment_paths(apps, schema_editor):
+    # walk the threads level by level, top-level comments first
+    Comment = apps.get_model('blog_app', 'Comment')
+    parents = {}
+    level = Comment.objects.filter(reply_to__isnull=True)
+    while True:
+        batch, current = [], {}
+        for comment in level.only('id', 'reply_to_id').iterator(chunk_size=2000):
+            path, root_id = parents.get(comment.reply_to_id, ('', comment.id))
+            comment.path, comment.root_id = f'{path}{comment.id:012d}/', root_id
+            current[comment.id] = (comment.path, root_id)
+            batch.append(comment)
+        if not batch:
+            break
+        Comment.objects.bulk_update(batch, ['path', 'root'], batch_size=1000)
+        parents = current
+        level = Comment.objects.filter(reply_to__in=level)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0021_counter_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='root',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread_comments', to='blog_app.comment'),
+        ),
+        migrations.RunPython(fill_comment_paths, migrations.RunPython.noop),
+    ]
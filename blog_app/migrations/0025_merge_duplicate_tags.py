@@ -0,0 +1,32 @@
+# Generated by Django 4.2.3 on 2026-10-18 20:41
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    # keeps the oldest tag of every name and moves the follows of the others to it,
+    # so the unique index on Tag.name can be created
+    Tag = apps.get_model('blog_app', 'Tag')
+    FollowTag = apps.get_model('blog_app', 'FollowTag')
+    duplicated = Tag.objects.values('name').annotate(keep=Min('pk'), copies=Count('pk')).filter(copies__gt=1)
+    for row in list(duplicated):
+        extra = list(Tag.objects.filter(name=row['name']).exclude(pk=row['keep']).values_list('pk', flat=True))
+        FollowTag.objects.filter(tag_id__in=extra).update(tag_id=row['keep'])
+        first_follows = list(
+            FollowTag.objects.filter(tag_id=row['keep']).values('user_id').annotate(first=Min('pk')).values_list('first', flat=True)
+        )
+        FollowTag.objects.filter(tag_id=row['keep']).exclude(pk__in=first_follows).delete()
+        Tag.objects.filter(pk__in=extra).delete()
+        Tag.objects.filter(pk=row['keep']).update(followers_count=len(first_follows))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0024_feedentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_tags, migrations.RunPython.noop),
+    ]
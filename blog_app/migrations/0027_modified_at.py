@@ -0,0 +1,46 @@
+# Generated by Django 4.2.3 on 2026-10-18 20:52
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def fill_modified_at(apps, schema_editor):
+    # rows written before the column existed count as unmodified since their creation
+    for name in ('Blog', 'Post', 'Comment', 'Series'):
+        apps.get_model('blog_app', name).objects.update(modified_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0026_tag_unique_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='series',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_modified_at, migrations.RunPython.noop),
+    ]
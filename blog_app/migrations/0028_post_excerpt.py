@@ -0,0 +1,41 @@
+# Generated by Django 4.2.3 on 2026-10-18 20:58
+
+from django.db import migrations, models
+
+
+def make_excerpt(text, length=300):
+    # blog_app.content.make_excerpt as of this migration: the beginning of a plain text, cut at a word boundary
+    if len(text) <= length:
+        return text
+    head = text[:length + 1]
+    head = head.rsplit(' ', 1)[0] if ' ' in head else text[:length]
+    return head.rstrip(' ,.;:') + '…'
+
+
+def fill_excerpts(apps, schema_editor):
+    # search_text already holds the plain text of the content
+    Post = apps.get_model('blog_app', 'Post')
+    batch = []
+    for post in Post.objects.only('search_text').iterator(chunk_size=500):
+        post.excerpt = make_excerpt(post.search_text)
+        batch.append(post)
+        if len(batch) == 500:
+            Post.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    Post.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0027_modified_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.3 on 2026-10-18 21:09
+
+from django.db import migrations
+from django.db.models import Count, F, Func, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# reaction model, its foreign key to the reacted object, and the counter of that object
+REACTIONS = [
+    ('Like', 'post', 'likes'),
+    ('LikeComment', 'comment', 'likes'),
+    ('SavedPost', 'post', None),
+    ('FollowTag', 'tag', 'followers_count'),
+]
+
+
+def count_subquery(queryset):
+    return Coalesce(Subquery(queryset.order_by().annotate(c=Func(F('pk'), function='COUNT')).values('c')), 0)
+
+
+def merge_duplicate_reactions(apps, schema_editor):
+    # keeps the oldest reaction of every (object, user) pair, so the unique constraints can be created
+    for model_name, target, counter in REACTIONS:
+        Model = apps.get_model('blog_app', model_name)
+        pairs = Model.objects.values(target, 'user').annotate(keep=Min('pk'), copies=Count('pk')).filter(copies__gt=1)
+        targets = set()
+        for pair in list(pairs):
+            Model.objects.filter(**{target: pair[target], 'user': pair['user']}).exclude(pk=pair['keep']).delete()
+            targets.add(pair[target])
+        if counter and targets:
+            Target = Model._meta.get_field(target).related_model
+            Target.objects.filter(pk__in=targets).update(
+                **{counter: count_subquery(Model.objects.filter(**{target: OuterRef('pk')}))}
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0029_post_content_derivatives'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_reactions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.3 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0030_merge_duplicate_reactions'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='followtag',
+            constraint=models.UniqueConstraint(fields=('tag', 'user'), name='unique_follow_tag'),
+        ),
+        migrations.AddConstraint(
+            model_name='like',
+            constraint=models.UniqueConstraint(fields=('post', 'user'), name='unique_like'),
+        ),
+        migrations.AddConstraint(
+            model_name='likecomment',
+            constraint=models.UniqueConstraint(fields=('comment', 'user'), name='unique_like_comment'),
+        ),
+        migrations.AddConstraint(
+            model_name='savedpost',
+            constraint=models.UniqueConstraint(fields=('post', 'user'), name='unique_saved_post'),
+        ),
+    ]
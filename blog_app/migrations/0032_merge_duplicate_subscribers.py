@@ -0,0 +1,34 @@
+# Generated by Django 4.2.3 on 2026-10-18 21:16
+
+from django.db import migrations
+from django.db.models import Count, F, Func, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset):
+    return Coalesce(Subquery(queryset.order_by().annotate(c=Func(F('pk'), function='COUNT')).values('c')), 0)
+
+
+def merge_duplicate_subscribers(apps, schema_editor):
+    # keeps the oldest subscription of every (blog, user) pair, so the unique constraint can be created
+    Blog = apps.get_model('blog_app', 'Blog')
+    Subscriber = apps.get_model('blog_app', 'Subscriber')
+    pairs = Subscriber.objects.values('blog', 'user').annotate(keep=Min('pk'), copies=Count('pk')).filter(copies__gt=1)
+    blogs = set()
+    for pair in list(pairs):
+        Subscriber.objects.filter(blog=pair['blog'], user=pair['user']).exclude(pk=pair['keep']).delete()
+        blogs.add(pair['blog'])
+    Blog.objects.filter(pk__in=blogs).update(
+        subscribers_count=count_subquery(Subscriber.objects.filter(blog=OuterRef('pk')))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0031_reaction_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_subscribers, migrations.RunPython.noop),
+    ]
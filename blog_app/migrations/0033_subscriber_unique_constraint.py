@@ -0,0 +1,17 @@
+# Generated by Django 4.2.3 on 2026-10-18 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0032_merge_duplicate_subscribers'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='subscriber',
+            constraint=models.UniqueConstraint(fields=('blog', 'user'), name='unique_subscriber'),
+        ),
+    ]
@@ -1,10 +1,14 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Exists, F, OuterRef, Prefetch, Q
 from django.contrib.auth.models import User
 from ckeditor_uploader.fields import RichTextUploadingField
-from bs4 import BeautifulSoup
-import os
 from taggit.managers import TaggableManager
 
+from .content import derive_content
+from .media import discard_media, referenced_uploads, upload_names
+from .search import update_post_index
+
 
 
 # you should set max_length for CharFileds if you use Django<4 or SQLite
@@ -17,15 +21,19 @@ class Blog(models.Model):
     logo = models.ImageField(upload_to='blog/logos/')
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    modified_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
     is_private = models.BooleanField(default=False)
+    # counters maintained by Post and Subscriber save/delete, see blog_app/counters.py
+    posts_count = models.PositiveIntegerField(default=0, db_index=True)
+    subscribers_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         verbose_name_plural = 'Blogs'
 
     def __str__(self):
         return self.title
-    
+
     @property
     def absolute_url(self):
         return f'/blog/{self.slug}/'
@@ -33,37 +41,82 @@ class Blog(models.Model):
     @property
     def posts(self):
         return Post.objects.filter(blog=self)
-    
-    @property
-    def posts_count(self):
-        return self.posts.count()
 
     @property
     def subscribers(self):
         return Subscriber.objects.filter(blog=self)
 
-    @property
-    def subscribers_count(self):
-        return self.subscribers.count()
-    
     @property
     def series(self):
         return Series.objects.filter(blog=self)
 
+    # membership checks: the owner is compared by id, authors and subscribers are single indexed EXISTS
+    # queries, memoized on the blog instance (views and models load a blog once per request)
+    def is_owner(self, user):
+        return user is not None and self.owner_id == user.pk
+
+    def is_author(self, user):
+        return self.membership('author', user)
+
+    def is_subscriber(self, user):
+        return self.membership('subscriber', user)
+
+    def can_read(self, user):
+        return not self.is_private or self.is_owner(user) or self.is_author(user) or self.is_subscriber(user)
+
+    def membership(self, role, user):
+        if user is None or user.pk is None:
+            return False
+        cache = self.__dict__.setdefault('_membership_cache', {})
+        key = (role, user.pk)
+        if key not in cache:
+            queryset = Blog.authers.through.objects if role == 'author' else Subscriber.objects
+            cache[key] = queryset.filter(blog_id=self.pk, user_id=user.pk).exists()
+        return cache[key]
+
+    def forget_membership(self):
+        self.__dict__.pop('_membership_cache', None)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        blog = super().from_db(db, field_names, values)
+        # remembered to find the replaced logo on save without reading the row again
+        if 'logo' in blog.__dict__:
+            blog._loaded_logo = blog.__dict__['logo']
+        return blog
+
     def save(self, *args, **kwargs):
         # delete old logo file from storage when blog is updated
-        try:
-            this = Blog.objects.get(id=self.id)
-            if this.logo != self.logo:
-                this.logo.delete(save=False)
-        except:
-            pass
-        super().save(*args, **kwargs)
-    
+        if self._state.adding:
+            old_logo = None
+        elif hasattr(self, '_loaded_logo'):
+            old_logo = self._loaded_logo
+        else:
+            old_logo = Blog.objects.filter(pk=self.pk).values_list('logo', flat=True).first()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if old_logo and old_logo != self.logo.name:
+                discard_media([old_logo])
+        self._loaded_logo = self.logo.name
+
     def delete(self, *args, **kwargs):
         # delete logo file from storage when blog is deleted
-        self.logo.delete()
-        super().delete(*args, **kwargs)
+        with transaction.atomic():
+            super().delete(*args, **kwargs)
+            discard_media([self.logo.name])
+
+
+class PostQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        # posts of public blogs, or of private blogs the user owns, writes for or is subscribed to
+        user_id = user.pk
+        return self.filter(
+            Q(blog__is_private=False)
+            | Q(blog__owner_id=user_id)
+            | Q(author_id=user_id)
+            | Exists(Blog.authers.through.objects.filter(blog_id=OuterRef('blog_id'), user_id=user_id))
+            | Exists(Subscriber.objects.filter(blog_id=OuterRef('blog_id'), user_id=user_id))
+        )
 
 
 class Post(models.Model):
@@ -73,17 +126,49 @@ class Post(models.Model):
     slug = models.CharField(unique=True)
     content = RichTextUploadingField()
     created_at = models.DateTimeField(auto_now_add=True)
+    modified_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
     is_private = models.BooleanField(default=False)
     is_published = models.BooleanField(default=True) # if false, post will not be shown in blog posts list, but will be shown in drafts list 
+    likes = models.PositiveIntegerField(default=0) # maintained by Like save/delete
+    # full-text search data, see blog_app/search.py
+    search_text = models.TextField(blank=True, default='', editable=False)
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
+    # derived from the content on save, see blog_app/content.py
+    excerpt = models.TextField(blank=True, default='', editable=False) # beginning of the plain text, for lists
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveIntegerField(default=0, editable=False) # minutes
+    images = models.JSONField(default=list, blank=True, editable=False) # image sources, in order
     tags = TaggableManager()
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = 'Posts'
+        # partial indexes for the newest-first post lists (PostList, FeedList, DraftList keyset pages)
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_active=True, is_published=True), name='post_published_idx'),
+            models.Index(fields=['blog', '-created_at', '-id'], condition=Q(is_active=True, is_published=True), name='post_blog_published_idx'),
+            models.Index(fields=['blog', '-created_at'], condition=Q(is_published=False), name='post_draft_idx'),
+        ]
 
     def __str__(self):
         return self.title
-    
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # remembered so posts are fanned out to feeds once, when they get published (see blog_app/feed.py)
+        if 'is_published' in post.__dict__ and 'is_active' in post.__dict__:
+            post._in_feeds = post.is_published and post.is_active
+        # remembered to find the uploads dropped from the content on save without reading the row again
+        if 'content' in post.__dict__:
+            post._loaded_content = post.content
+        # remembered to move the post between the blogs' posts_count when its blog changes
+        if 'blog_id' in post.__dict__:
+            post._loaded_blog_id = post.blog_id
+        return post
+
     @property
     def absolute_url(self):
         return f'/post/{self.slug}/'
@@ -91,93 +176,187 @@ class Post(models.Model):
     @property
     def comments(self):
         return Comment.objects.filter(post=self)
-    
-    @property
-    def likes(self):
-        return Like.objects.filter(post=self).count()
 
     def save(self, *args, **kwargs):
         # check if author is in blog authers
-        if self.author not in self.blog.authers.all():
+        if not self.blog.is_author(self.author):
             raise Exception('Author is not in blog authers')
-        # delete old uploaded files from storage when post is updated
-        try:
-            this = Post.objects.get(id=self.id)
-            if this.content != self.content:
-                soup = BeautifulSoup(this.content, 'html.parser')
-                page_images = [image["src"] for image in soup.findAll("img")]
-                for image in page_images:
-                    image = image[1:]
-                    os.remove(image)
-        except:
-            pass
-        # save new tags in tags table
-        for tag in self.tags.all():
-            try:
-                Tag.objects.get(name=tag.name)
-            except:
-                Tag.objects.create(name=tag.name)
-        super().save(*args, **kwargs)
-    
+        # delete uploaded files no longer in the content from storage when post is updated
+        if self._state.adding:
+            old_content, old_blog_id = '', None
+        elif hasattr(self, '_loaded_content') and hasattr(self, '_loaded_blog_id'):
+            old_content, old_blog_id = self._loaded_content, self._loaded_blog_id
+        else:
+            old_content, old_blog_id = Post.objects.filter(pk=self.pk).values_list('content', 'blog_id').first() or ('', self.blog_id)
+        derived = derive_content(self.content)
+        dropped_uploads = referenced_uploads(old_content) - upload_names(derived['images']) if old_content != self.content else set()
+        for name, value in derived.items():
+            setattr(self, name, value)
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if old_blog_id != self.blog_id:
+                if old_blog_id is not None:
+                    Blog.objects.filter(pk=old_blog_id).update(posts_count=F('posts_count') - 1)
+                Blog.objects.filter(pk=self.blog_id).update(posts_count=F('posts_count') + 1)
+            update_post_index(self, tag_names=[] if adding else None)
+            discard_media(dropped_uploads)
+        self._loaded_content = self.content
+        self._loaded_blog_id = self.blog_id
+
     def delete(self, *args, **kwargs):
-        # delete uploaded files from storage when post is deleted
-        try:
-            soup = BeautifulSoup(self.content, 'html.parser')
-            page_images = [image["src"] for image in soup.findAll("img")]
-            for image in page_images:
-                image = image[1:]
-                os.remove(image)
-        except:
-            pass
-        super().delete(*args, **kwargs)
+        # tagged items and series posts are removed with the post, so tag and series counters go down too
+        tag_names = list(self.tags.names())
+        series_ids = list(self.series_posts.values_list('pk', flat=True))
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            if not deleted[1].get(self._meta.label):
+                return deleted
+            Blog.objects.filter(pk=self.blog_id).update(posts_count=F('posts_count') - 1)
+            Tag.objects.filter(name__in=tag_names).update(posts_count=F('posts_count') - 1)
+            Series.objects.filter(pk__in=series_ids).update(posts_count=F('posts_count') - 1)
+            # delete uploaded files from storage when post is deleted
+            discard_media(referenced_uploads(self.content))
+        return deleted
+
+
+def comment_path_segment(pk):
+    # fixed width keeps lexicographic order of paths equal to thread order
+    return f'{pk:012d}/'
+
+
+class CommentQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        # comments of the posts the user can read
+        return self.filter(post__in=Post.objects.visible_to(user))
+
+    def with_likers_and_replies(self):
+        # everything CommentSerializer reads, in a fixed number of queries
+        return self.prefetch_related(
+            Prefetch('likecomment_set', queryset=LikeComment.objects.select_related('user')),
+            Prefetch('comment_set', queryset=Comment.objects.select_related('author', 'post').defer('post__content')),
+        )
 
 
 class Comment(models.Model):
-    post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, db_index=False)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
     reply_to = models.ForeignKey('self', on_delete=models.CASCADE, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    modified_at = models.DateTimeField(auto_now=True)
+    likes = models.PositiveIntegerField(default=0) # maintained by LikeComment save/delete
+    # materialized path of the thread: zero-padded ids from the top-level comment down to this one,
+    # so a whole thread or subtree is one indexed range scan ordered by path
+    path = models.CharField(db_index=True, editable=False, default='')
+    root = models.ForeignKey('self', on_delete=models.CASCADE, blank=True, null=True, editable=False, related_name='thread_comments', db_index=False)
 
-    @property
-    def likes(self):
-        return LikeComment.objects.filter(comment=self).count()
+    objects = CommentQuerySet.as_manager()
 
     @property
     def replies(self):
-        return Comment.objects.filter(reply_to=self)
-    
+        # related manager, so .all() reads the prefetched replies when present
+        return self.comment_set
+
     @property
     def likers(self):
-        return [like.user for like in LikeComment.objects.filter(comment=self)]
+        # uses the prefetched likes when present, otherwise loads likes and users in one query
+        if 'likecomment_set' in getattr(self, '_prefetched_objects_cache', {}):
+            likes = self.likecomment_set.all()
+        else:
+            likes = self.likecomment_set.select_related('user')
+        return [like.user for like in likes]
+
+    @property
+    def depth(self):
+        return self.path.count('/') - 1
+
     class Meta:
         verbose_name_plural = 'Comments'
+        # foreign keys declared with db_index=False (here and in the models below) are the first column
+        # of an index or unique constraint of their Meta, which serves their lookups and joins
+        indexes = [
+            # comments of a post by time (CommentList), top-level ones for thread pages (PostCommentThread)
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+            models.Index(fields=['post', 'created_at', 'id'], condition=Q(reply_to__isnull=True), name='comment_post_top_level_idx'),
+            # replies of a page of threads in thread order
+            models.Index(fields=['root', 'path'], name='comment_root_path_idx'),
+        ]
 
     def __str__(self):
         return f'{self.author} on {self.post}'
-    
+
     def save(self, *args, **kwargs):
         # check reply_to is in post comments
         if self.reply_to:
-            if self.reply_to.post != self.post:
+            if self.reply_to.post_id != self.post_id:
                 raise Exception('Reply to is not in post comments')
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                # the path needs the new id, so it is written right after the insert
+                if self.reply_to:
+                    self.path, self.root_id = self.reply_to.path, self.reply_to.root_id
+                else:
+                    self.path, self.root_id = '', self.pk
+                self.path += comment_path_segment(self.pk)
+                Comment.objects.filter(pk=self.pk).update(path=self.path, root_id=self.root_id)
+
+
+class FeedEntry(models.Model):
+    # a post in the home feed of a user, written when the post is published
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    created_at = models.DateTimeField() # copy of the post creation time, the feed order
+
+    class Meta:
+        verbose_name_plural = 'Feed Entries'
+        constraints = [models.UniqueConstraint(fields=['user', 'post'], name='unique_feed_entry')]
+        indexes = [models.Index(fields=['user', '-created_at', '-post'], name='feed_entry_timeline_idx')]
+
+    def __str__(self):
+        return f'{self.post} for {self.user}'
 
 
 class Subscriber(models.Model):
-    blog = models.ForeignKey(Blog, on_delete=models.CASCADE)
+    blog = models.ForeignKey(Blog, on_delete=models.CASCADE, db_index=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     subscribed_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name_plural = 'Subscribers'
+        constraints = [models.UniqueConstraint(fields=['blog', 'user'], name='unique_subscriber')]
+        indexes = [models.Index(fields=['blog', '-subscribed_at', '-id'], name='subscriber_blog_time_idx')]
 
     def __str__(self):
         return f'{self.user} on {self.blog}'
-    
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Blog.objects.filter(pk=self.blog_id).update(subscribers_count=F('subscribers_count') + 1)
+        self.forget_blog_membership()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            # the row may already be gone (a concurrent delete), then it was counted down already
+            if deleted[0]:
+                Blog.objects.filter(pk=self.blog_id).update(subscribers_count=F('subscribers_count') - 1)
+        self.forget_blog_membership()
+        return deleted
+
+    def forget_blog_membership(self):
+        # the loaded blog may have memoized this user as (not) subscribed
+        if Subscriber.blog.is_cached(self):
+            self.blog.forget_membership()
+
 
 class SubscribeRequest(models.Model):
-    blog = models.ForeignKey(Blog, on_delete=models.CASCADE)
+    blog = models.ForeignKey(Blog, on_delete=models.CASCADE, db_index=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     requested_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected')], default='pending')
@@ -185,6 +364,7 @@ class SubscribeRequest(models.Model):
 
     class Meta:
         verbose_name_plural = 'Subscribe Requests'
+        indexes = [models.Index(fields=['blog', 'user', 'status'], name='subscribe_request_lookup_idx')]
 
     def __str__(self):
         return f'{self.user} on {self.blog}'
@@ -193,35 +373,28 @@ class SubscribeRequest(models.Model):
         # check subscribe request for only private blogs
         if not self.blog.is_private:
             raise Exception('Blog is not private')
-        # check if user is in blog authers or owner
-        if self.user not in self.blog.authers.all() and self.user != self.blog.owner:
-            # check if user is already requested
-            try:
-                SubscribeRequest.objects.get(blog=self.blog, user=self.user)
-                raise Exception('User is already requested')
-            except:
-                pass
-            # check if user is already subscribed
-            try:
-                Subscriber.objects.get(blog=self.blog, user=self.user)
-                raise Exception('User is already subscribed')
-            except:
-                if self.status == 'accepted':
-                    # create subscriber
-                    Subscriber.objects.create(blog=self.blog, user=self.user)
-                    self.is_deleted = True
-                elif self.status == 'rejected':
-                    self.is_deleted = True
-                super().save(*args, **kwargs)
+        # owner and authors of the blog do not need to subscribe
+        if self.blog.is_owner(self.user) or self.blog.is_author(self.user):
+            return
+        if self.status == 'accepted':
+            # create subscriber, unless user is already subscribed
+            if not self.blog.is_subscriber(self.user):
+                Subscriber.objects.create(blog=self.blog, user=self.user)
+            self.is_deleted = True
+        elif self.status == 'rejected':
+            self.is_deleted = True
+        super().save(*args, **kwargs)
 
 
 class Like(models.Model):
-    post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, db_index=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     liked_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name_plural = 'Likes'
+        constraints = [models.UniqueConstraint(fields=['post', 'user'], name='unique_like')]
+        indexes = [models.Index(fields=['post', '-liked_at', '-id'], name='like_post_time_idx')]
 
     def __str__(self):
         return f'{self.user} on {self.post}'
@@ -229,37 +402,62 @@ class Like(models.Model):
     def save(self, *args, **kwargs):
         # check if user is subscribed to this blog or blog is not private
         if self.post.blog.is_private:
-            if not self.post.blog.subscribers.filter(user=self.user).exists():
+            if not (self.post.blog.is_owner(self.user) or self.post.author_id == self.user.pk or self.post.blog.is_subscriber(self.user)):
                 raise Exception('This blog is private. make request to subscribe.')
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Post.objects.filter(pk=self.post_id).update(likes=F('likes') + 1)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            if deleted[0]:
+                Post.objects.filter(pk=self.post_id).update(likes=F('likes') - 1)
+        return deleted
 
 
 class LikeComment(models.Model):
-    comment = models.ForeignKey(Comment, on_delete=models.CASCADE)
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, db_index=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     liked_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name_plural = 'Like Comments'
+        constraints = [models.UniqueConstraint(fields=['comment', 'user'], name='unique_like_comment')]
 
     def __str__(self):
         return f'{self.user} on {self.comment}'
     
     def save(self, *args, **kwargs):
         # check if user is subscribed to this blog or blog is not private
-        if self.comment.post.blog.is_private:
-            if not self.comment.post.blog.subscribers.filter(user=self.user).exists() and self.comment.post.blog.owner != self.user and self.comment.post.author != self.user:
+        post = self.comment.post
+        if post.blog.is_private:
+            if not (post.blog.is_owner(self.user) or post.author_id == self.user.pk or post.blog.is_subscriber(self.user)):
                 raise Exception('This blog is private. make request to subscribe.')
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Comment.objects.filter(pk=self.comment_id).update(likes=F('likes') + 1)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            if deleted[0]:
+                Comment.objects.filter(pk=self.comment_id).update(likes=F('likes') - 1)
+        return deleted
 
 
 class SavedPost(models.Model):
-    post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, db_index=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     saved_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name_plural = 'Saved Posts'
+        constraints = [models.UniqueConstraint(fields=['post', 'user'], name='unique_saved_post')]
 
     def __str__(self):
         return f'{self.user} on {self.post}'
@@ -267,31 +465,48 @@ class SavedPost(models.Model):
     def save(self, *args, **kwargs):
         # check if user is subscribed to this blog or blog is not private
         if self.post.blog.is_private:
-            if not self.post.blog.subscribers.filter(user=self.user).exists() and self.post.blog.owner != self.user and self.post.author != self.user:
+            if not (self.post.blog.is_owner(self.user) or self.post.author_id == self.user.pk or self.post.blog.is_subscriber(self.user)):
                 raise Exception('This blog is private. make request to subscribe.')
         super().save(*args, **kwargs)
 
 
+class TagQuerySet(models.QuerySet):
+    def ensure(self, names):
+        # creates the tags of the given names that do not exist yet: one query for the existing names, one bulk insert
+        names = set(names)
+        missing = names - set(self.filter(name__in=names).values_list('name', flat=True))
+        if missing:
+            self.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        return missing
+
+    def with_followers(self):
+        # the followers TagSerializer reads, in one query for all tags
+        return self.prefetch_related(Prefetch('followtag_set', queryset=FollowTag.objects.select_related('user')))
+
+
 class Tag(models.Model):
-    name = models.CharField()
+    # rows are created when a post is tagged with a new name, see blog_app/signals.py
+    name = models.CharField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # counters maintained by post tagging (blog_app/signals.py) and FollowTag save/delete
+    posts_count = models.PositiveIntegerField(default=0, db_index=True)
+    followers_count = models.PositiveIntegerField(default=0)
+
+    objects = TagQuerySet.as_manager()
 
     @property
     def posts(self):
         return Post.objects.filter(tags__name=self.name)
-    
-    @property
-    def posts_count(self):
-        return self.posts.count()
-    
+
     @property
     def followers(self):
-        return [follow.user for follow in FollowTag.objects.filter(tag=self)]
-    
-    @property
-    def followers_count(self):
-        return len(self.followers)
-    
+        # uses the prefetched follows when present, otherwise loads follows and users in one query
+        if 'followtag_set' in getattr(self, '_prefetched_objects_cache', {}):
+            follows = self.followtag_set.all()
+        else:
+            follows = self.followtag_set.select_related('user')
+        return [follow.user for follow in follows]
+
     class Meta:
         verbose_name_plural = 'Tags'
 
@@ -300,16 +515,31 @@ class Tag(models.Model):
     
 
 class FollowTag(models.Model):
-    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, db_index=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     followed_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         verbose_name_plural = 'Follow Tags'
+        constraints = [models.UniqueConstraint(fields=['tag', 'user'], name='unique_follow_tag')]
 
     def __str__(self):
         return f'{self.user} on {self.tag}'
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Tag.objects.filter(pk=self.tag_id).update(followers_count=F('followers_count') + 1)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            if deleted[0]:
+                Tag.objects.filter(pk=self.tag_id).update(followers_count=F('followers_count') - 1)
+        return deleted
+
 
 class Report(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, blank=True, null=True)
@@ -324,6 +554,7 @@ class Report(models.Model):
 
     class Meta:
         verbose_name_plural = 'Reports'
+        indexes = [models.Index(fields=['status', '-reported_at'], name='report_status_idx')]
 
     def __str__(self):
         return f'{self.user} on {self.post}'
@@ -336,8 +567,10 @@ class Series(models.Model):
     slug = models.CharField(unique=True)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    modified_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
     is_deleted = models.BooleanField(default=False)
+    posts_count = models.PositiveIntegerField(default=0) # maintained on posts changes, see blog_app/signals.py
 
     class Meta:
         verbose_name_plural = 'Series'
@@ -348,11 +581,7 @@ class Series(models.Model):
     @property
     def absolute_url(self):
         return f'/series/{self.slug}/'
-    
-    @property
-    def posts_count(self):
-        return self.posts.count()
-    
+
     def delete(self, *args, **kwargs):
         self.is_deleted = True
         super().save(*args, **kwargs)
@@ -0,0 +1,183 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ThreadCursorPagination(CursorPagination):
+    # top-level comments of a thread, oldest first
+    ordering = ('created_at', 'id')
+    page_size = 20
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination with an opt-in keyset (cursor) mode for high-volume lists.
+
+    Sending ?cursor (empty for the first page) switches to keyset mode: rows are read
+    after the last row of the previous page with an indexed range condition on
+    (ordering fields..., pk), so every page costs the same whatever its depth.
+    The ordering is the one chosen by OrderingFilter (or search ranking) when it is
+    made of plain fields, otherwise the view's cursor_ordering; pk is always added
+    as tie-breaker. Cursors are opaque and only link forward.
+
+    ?count=false skips the COUNT query in limit/offset mode; in keyset mode the count
+    is only computed with ?count=true.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+    keyset_only = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keyset = self.keyset_only or self.cursor_query_param in request.query_params
+        self.with_count = self.get_with_count(request, default=not self.keyset)
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        if self.keyset:
+            return self.paginate_keyset(queryset, request, view)
+        if self.with_count:
+            return super().paginate_queryset(queryset, request, view)
+        self.offset = self.get_offset(request)
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        # no COUNT query: the extra row tells whether there is a next page
+        self.count = self.offset + len(rows)
+        return rows[:self.limit]
+
+    def paginate_keyset(self, queryset, request, view):
+        self.ordering = self.get_keyset_ordering(queryset, view)
+        queryset = queryset.order_by(*self.ordering)
+        if self.with_count:
+            self.count = self.get_count(queryset)
+        values = self.decode_cursor(request, queryset.model)
+        if values is not None:
+            queryset = queryset.filter(keyset_filter(self.ordering, values))
+        rows = list(queryset[:self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        self.page = rows[:self.limit]
+        return self.page
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # paginate_queryset for async views (blog_app/async_views.py): same pages, links and cursors, rows read with the async ORM
+        self.request = request
+        self.keyset = self.keyset_only or self.cursor_query_param in request.query_params
+        self.with_count = self.get_with_count(request, default=not self.keyset)
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return await fetch_rows(queryset)
+        if self.keyset:
+            self.ordering = self.get_keyset_ordering(queryset, view)
+            queryset = queryset.order_by(*self.ordering)
+            if self.with_count:
+                self.count = await queryset.acount()
+            values = self.decode_cursor(request, queryset.model)
+            if values is not None:
+                queryset = queryset.filter(keyset_filter(self.ordering, values))
+            rows = await fetch_rows(queryset[:self.limit + 1])
+            self.has_next = len(rows) > self.limit
+            self.page = rows[:self.limit]
+            return self.page
+        self.offset = self.get_offset(request)
+        if self.with_count:
+            self.count = await queryset.acount()
+            if self.count == 0 or self.offset > self.count:
+                return []
+            return await fetch_rows(queryset[self.offset:self.offset + self.limit])
+        rows = await fetch_rows(queryset[self.offset:self.offset + self.limit + 1])
+        self.count = self.offset + len(rows)
+        return rows[:self.limit]
+
+    def get_with_count(self, request, default):
+        value = request.query_params.get(self.count_query_param)
+        if value is None:
+            return default
+        return value.lower() not in ('0', 'false', 'no')
+
+    def get_keyset_ordering(self, queryset, view):
+        ordering = [
+            field for field in queryset.query.order_by
+            if isinstance(field, str) and '__' not in field and field != '?'
+        ]
+        if not ordering or len(ordering) != len(queryset.query.order_by):
+            ordering = list(getattr(view, 'cursor_ordering', ('-pk',)))
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('-pk' if ordering[-1].startswith('-') else 'pk')
+        return ordering
+
+    def encode_cursor(self, row):
+        return self.encode_values([getattr(row, field.lstrip('-')) for field in self.ordering])
+
+    def encode_values(self, values):
+        payload = json.dumps({
+            'o': self.ordering,
+            'v': [value.isoformat() if hasattr(value, 'isoformat') else value for value in values],
+        })
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            if payload['o'] != self.ordering or len(payload['v']) != len(self.ordering):
+                raise ValueError
+            return [to_python(model, field.lstrip('-'), value) for field, value in zip(self.ordering, payload['v'])]
+        except (binascii.Error, DjangoValidationError, KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        if self.keyset:
+            payload = {'next': self.get_next_link(), 'results': data}
+        else:
+            payload = {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+        if self.with_count:
+            payload = {'count': self.count, **payload}
+        return payload
+
+
+async def fetch_rows(queryset):
+    # aiterator() can not prefetch related objects (Django 4.2), async iteration fetches rows and prefetches in one step
+    if queryset._prefetch_related_lookups:
+        return [row async for row in queryset]
+    return [row async for row in queryset.aiterator()]
+
+
+def to_python(model, name, value):
+    # cursor values of model fields are parsed back, annotation values (e.g. search rank) are kept as is
+    try:
+        field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return value
+    return field.to_python(value)
+
+
+def keyset_filter(ordering, values):
+    # rows strictly after the given values in (ordering...) order, ascending or descending per field
+    condition, equal = Q(), {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
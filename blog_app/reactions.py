@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.db.models import F
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .caching import bump_cache_versions_on_commit
+from .serializers import BatchSerializer
+
+"""
+    This file contains the write endpoints of user reactions (likes, saved posts, tag follows, subscriptions).
+    Reactions are unique per (object, user), so writes are idempotent: the reacted objects are locked, then
+    only missing reactions are created and existing ones deleted, and the counters of the objects move by
+    the reactions actually written with one F() UPDATE. Repeated requests read and write nothing else.
+        - ReactionToggleView: PUT creates the reaction of the request user to one object, DELETE removes it
+        - BatchReactionView: the same for a list of target ids ({"ids": [...]}), checked with one query for
+          the targets the user may react to and one for the existing reactions, written with a single
+          bulk_create(ignore_conflicts=True) or DELETE; every id gets its own result:
+          created, exists, deleted or not_found
+"""
+
+
+class ReactionMixin:
+    """
+    model is the reaction model, target_field its foreign key to the reacted object;
+    targets the objects the user may react to: a queryset, or a function of the user returning one;
+    counter (optional) is the column of the reacted objects counting their reactions.
+    """
+    permission_classes = [IsAuthenticated]
+    model = None
+    target_field = None
+    targets = None
+    counter = None
+
+    def get_targets(self, request):
+        return self.targets(request.user) if callable(self.targets) else self.targets.all()
+
+    def get_target_model(self):
+        return self.model._meta.get_field(self.target_field).related_model
+
+    def lock(self, targets, ids):
+        # the targets among ids, locked in id order until the end of the transaction: concurrent requests
+        # for the same reactions wait, then see each other's rows, so nothing is counted twice
+        # (model instances: with values() FOR UPDATE would lock the joined rows too)
+        locked = targets.filter(pk__in=ids).only('pk').order_by('pk').select_for_update(of=('self',))
+        return {target.pk for target in locked}
+
+    def reactions(self, request, ids):
+        return self.model.objects.filter(user_id=request.user.pk, **{f'{self.target_field}_id__in': ids})
+
+    def create_reactions(self, request, ids):
+        self.model.objects.bulk_create(
+            [self.model(user_id=request.user.pk, **{f'{self.target_field}_id': pk}) for pk in ids],
+            ignore_conflicts=True,
+        )
+
+    def touched(self, ids, delta):
+        # ids gained (delta 1) or lost (delta -1) a reaction
+        if not ids:
+            return
+        target_model = self.get_target_model()
+        if self.counter is not None:
+            target_model.objects.filter(pk__in=ids).update(**{self.counter: F(self.counter) + delta})
+        # bulk writes send no model signals: the reactions' versions and their targets'
+        bump_cache_versions_on_commit([self.model, *((target_model, pk) for pk in ids)])
+
+
+class ReactionToggleView(ReactionMixin, APIView):
+    def put(self, request, pk):
+        with transaction.atomic():
+            if not self.lock(self.get_targets(request), [pk]):
+                raise NotFound()
+            # repeating the request changes nothing
+            if not self.reactions(request, [pk]).exists():
+                self.create_reactions(request, [pk])
+                self.touched([pk], 1)
+        return Response(status=204)
+
+    def delete(self, request, pk):
+        with transaction.atomic():
+            deleted, _ = self.reactions(request, [pk]).delete()
+            if deleted:
+                self.touched([pk], -1)
+        return Response(status=204)
+
+
+class BatchReactionView(ReactionMixin, APIView):
+    def get_ids(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # duplicates are answered once, in request order
+        return list(dict.fromkeys(serializer.validated_data['ids']))
+
+    def existing(self, request, ids):
+        return set(self.reactions(request, ids).values_list(f'{self.target_field}_id', flat=True))
+
+    def post(self, request):
+        ids = self.get_ids(request)
+        with transaction.atomic():
+            allowed = self.lock(self.get_targets(request), ids)
+            existing = self.existing(request, ids)
+            created = [pk for pk in ids if pk in allowed and pk not in existing]
+            self.create_reactions(request, created)
+            self.touched(created, 1)
+        statuses = {pk: 'created' for pk in created}
+        statuses.update({pk: 'exists' for pk in existing if pk in allowed})
+        return self.results(ids, statuses)
+
+    def delete(self, request):
+        ids = self.get_ids(request)
+        with transaction.atomic():
+            self.lock(self.get_target_model().objects.all(), ids)
+            existing = self.existing(request, ids)
+            self.reactions(request, existing).delete()
+            self.touched(existing, -1)
+        return self.results(ids, {pk: 'deleted' for pk in existing})
+
+    def results(self, ids, statuses):
+        return Response({'results': [{'id': pk, 'status': statuses.get(pk, 'not_found')} for pk in ids]})
@@ -0,0 +1,124 @@
+import functools
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import connection, connections
+from django.db.models import F, Q, Value
+from django.db.models.expressions import RawSQL
+
+"""
+    This file contains the full-text search of posts.
+    Post.save stores the plain text of the content in Post.search_text, then the
+    search index is refreshed with title, tags and text weighted in that order:
+        - PostgreSQL: Post.search_vector, a weighted tsvector with a GIN index
+        - SQLite: the blog_app_post_fts FTS5 table, ranked with bm25
+        - other databases: plain icontains over title and search_text
+    The index objects are created by migration 0023_post_search.
+"""
+
+FTS_TABLE = 'blog_app_post_fts'
+FTS_WEIGHTS = (10.0, 5.0, 1.0) # title, tags, body
+
+
+def backend():
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite' and fts_table_exists():
+        return 'sqlite'
+    return 'fallback'
+
+
+def fts_table_exists():
+    # checked once per database: the table only comes and goes with migrations, which forget the answer
+    return database_has_fts_table(connection.alias, connection.settings_dict['NAME'])
+
+
+@functools.lru_cache(maxsize=None)
+def database_has_fts_table(alias, name):
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def forget_fts_table():
+    database_has_fts_table.cache_clear()
+
+
+def update_post_index(post, tag_names=None):
+    from .models import Post
+    if tag_names is None:
+        tag_names = list(post.tags.names())
+    tags = ' '.join(tag_names)
+    engine = backend()
+    if engine == 'postgresql':
+        Post.objects.filter(pk=post.pk).update(search_vector=(
+            SearchVector('title', weight='A') + SearchVector(Value(tags), weight='B') + SearchVector('search_text', weight='C')
+        ))
+    elif engine == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, tags, body) VALUES (%s, %s, %s, %s)',
+                [post.pk, post.title, tags, post.search_text],
+            )
+
+
+def index_posts(posts, tag_names):
+    # update_post_index for many posts in one statement, tag_names maps post ids to their tag names
+    engine = backend()
+    if not posts or engine == 'fallback':
+        return
+    rows = [(post.pk, ' '.join(tag_names.get(post.pk, ()))) for post in posts]
+    with connection.cursor() as cursor:
+        if engine == 'postgresql':
+            table = posts[0]._meta.db_table
+            values = ', '.join(['(%s, %s)'] * len(rows))
+            cursor.execute(
+                f"UPDATE {table} SET search_vector = setweight(to_tsvector(COALESCE({table}.title, '')), 'A') "
+                f"|| setweight(to_tsvector(v.tags), 'B') || setweight(to_tsvector(COALESCE({table}.search_text, '')), 'C') "
+                f'FROM (VALUES {values}) AS v(id, tags) WHERE {table}.id = v.id',
+                [value for row in rows for value in row],
+            )
+        else:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, tags, body) VALUES (%s, %s, %s, %s)',
+                [(post.pk, post.title, tags, post.search_text) for post, (pk, tags) in zip(posts, rows)],
+            )
+
+
+def remove_post_index(post_id):
+    if backend() == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def fts_match_expression(terms):
+    # every term quoted so user input can not use FTS5 query syntax; terms are ANDed
+    return ' '.join('"%s"' % term.replace('"', '""') for term in terms)
+
+
+def search_posts(queryset, terms):
+    """
+    Filters posts matching all terms, annotated with search_rank and search_headline
+    (the matching part of the text, matches wrapped in <b>) and ordered by rank.
+    """
+    engine = backend()
+    if engine == 'postgresql':
+        query = SearchQuery(' '.join(terms), search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query),
+            search_headline=SearchHeadline('search_text', query, max_words=35, min_words=15),
+        ).order_by('-search_rank', '-id')
+    if engine == 'sqlite':
+        match = fts_match_expression(terms)
+        table = queryset.model._meta.db_table
+        matching = f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {table}.id'
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(
+            # bm25 is lower for better matches
+            search_rank=RawSQL(f'SELECT -bm25({FTS_TABLE}, {weights}) {matching}', [match]),
+            search_headline=RawSQL(f"SELECT snippet({FTS_TABLE}, 2, '<b>', '</b>', '...', 24) {matching}", [match]),
+        ).order_by('-search_rank', '-id')
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(search_text__icontains=term))
+    return queryset
@@ -0,0 +1,253 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from taggit.models import Tag as TaggitTag, TaggedItem
+
+from .caching import bump_cache_version
+from .content import derive_content
+from .counters import recount_blogs, recount_tags
+from .feed import fanout_limit, get_feed_store
+from .models import *
+from .search import index_posts
+
+"""
+    This file contains the high-volume synthetic data generator used by the seed_blog command
+    and the API benchmark (blog_app/benchmark.py).
+    Rows are generated in batches and written with bulk_create, so memory stays bounded by the batch size
+    and the model save() hooks (membership checks, counters, search index, feeds) are bypassed.
+    What those hooks maintain is written in bulk instead:
+        - derived content (excerpt, word count ...), computed once per body of a pool of generated bodies
+        - tags (taggit items and blog_app tags), the search index and the feeds of subscribers and tag followers
+        - comment paths (comment ids are assigned by the generator), and like counters, known when the rows are generated
+        - blog and tag counters, recounted at the end
+    Nothing else may write comments meanwhile. Only valid rows are generated: authors write for their blog, private blogs are only liked and
+    commented by their owner, authers and subscribers. The same seed on the same empty database gives the same data.
+"""
+
+WORDS = (
+    'django python query index cache latency request response database server client async thread '
+    'stream batch token session feed comment thread reply like tag follow blog post draft series search '
+    'vector rank page cursor offset limit count join scan plan sort filter prefetch select write read '
+    'commit rollback lock queue worker process memory disk network'
+).split()
+TAG_NAMES = ['python', 'django', 'postgres', 'sqlite', 'performance', 'caching', 'async', 'testing',
+             'security', 'devops', 'frontend', 'api', 'search', 'design', 'career', 'news']
+
+
+def sentence(rng, words=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def rich_html(rng, paragraphs=6):
+    # headings, paragraphs with inline markup and links, lists and images, like CKEditor output
+    parts = [f'<h2>{sentence(rng, 5)}</h2>']
+    for number in range(paragraphs):
+        word = rng.choice(WORDS)
+        parts.append(
+            f'<p>{sentence(rng, 30)} <strong>{word}</strong> <a href="https://example.com/{word}">{sentence(rng, 4)}</a> '
+            f'{sentence(rng, 20)}</p>'
+        )
+        if number % 3 == 1:
+            parts.append('<ul>' + ''.join(f'<li>{sentence(rng, 6)}</li>' for _ in range(3)) + '</ul>')
+        if number % 3 == 2:
+            parts.append(f'<p><img src="/media/uploads/seed/{rng.randrange(1000)}.png" alt="{word}"></p>')
+    return ''.join(parts)
+
+
+def around(rng, mean):
+    # a count averaging mean
+    return rng.randint(0, 2 * mean) if mean > 0 else 0
+
+
+class BlogSeeder:
+    """
+    Generates users, blogs (with authers, subscribers, subscribe requests and tag follows), posts (with tags, comment threads,
+    likes and comment likes). Counts are totals for users, blogs and posts and averages for the others.
+    run() is a generator of (model name, rows written, rows planned) progress reports.
+    """
+    def __init__(self, users=1000, blogs=100, posts=10000, comments=5, likes=10, subscribers=20, follows=2,
+                 authers=3, private_ratio=0.2, draft_ratio=0.1, batch_size=2000, seed=1, prefix='seed'):
+        self.counts = {'users': users, 'blogs': blogs, 'posts': posts}
+        self.comments, self.likes, self.subscribers, self.follows = comments, likes, subscribers, follows
+        self.authers, self.private_ratio, self.draft_ratio = authers, private_ratio, draft_ratio
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.prefix = f'{prefix}-{seed}'
+
+    def run(self):
+        yield from self.seed_users()
+        self.seed_tags()
+        yield from self.seed_blogs()
+        yield from self.seed_posts()
+        self.finish()
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(start + self.batch_size, total)
+
+    def seed_users(self):
+        password = make_password(None)
+        self.user_ids = []
+        for start, end in self.batches(self.counts['users']):
+            users = User.objects.bulk_create([
+                User(username=f'{self.prefix}-u{number}', first_name=self.rng.choice(WORDS).capitalize(), password=password)
+                for number in range(start, end)
+            ])
+            self.user_ids += [user.pk for user in users]
+            yield 'users', end, self.counts['users']
+
+    def seed_tags(self):
+        TaggitTag.objects.bulk_create([TaggitTag(name=name, slug=name) for name in TAG_NAMES], ignore_conflicts=True)
+        self.taggit_ids = dict(TaggitTag.objects.filter(name__in=TAG_NAMES).values_list('name', 'pk'))
+        Tag.objects.ensure(TAG_NAMES)
+        tag_ids = dict(Tag.objects.filter(name__in=TAG_NAMES).values_list('name', 'pk'))
+        # followers per tag name, tags above the fan-out limit are merged into feeds on read
+        self.tag_followers = {name: [] for name in TAG_NAMES}
+        follows = []
+        for user_id in self.user_ids:
+            for name in self.rng.sample(TAG_NAMES, min(around(self.rng, self.follows), len(TAG_NAMES))):
+                follows.append(FollowTag(tag_id=tag_ids[name], user_id=user_id))
+                self.tag_followers[name].append(user_id)
+            if len(follows) >= self.batch_size:
+                FollowTag.objects.bulk_create(follows)
+                follows = []
+        FollowTag.objects.bulk_create(follows)
+        limit = fanout_limit()
+        self.tag_followers = {name: ids for name, ids in self.tag_followers.items() if len(ids) <= limit}
+
+    def seed_blogs(self):
+        # blog id: (is_private, owner id, authers ids, subscriber ids)
+        self.blog_members = {}
+        total = self.counts['blogs']
+        for start, end in self.batches(total):
+            with transaction.atomic():
+                blogs = Blog.objects.bulk_create([
+                    Blog(
+                        owner_id=self.rng.choice(self.user_ids), title=sentence(self.rng, 3), slug=f'{self.prefix}-b{number}',
+                        logo='blog/logos/seed.png', description=sentence(self.rng), is_private=self.rng.random() < self.private_ratio,
+                    )
+                    for number in range(start, end)
+                ])
+                writers, subscribers, requests = [], [], []
+                for blog in blogs:
+                    authers = {blog.owner_id, *self.rng.sample(self.user_ids, min(self.authers, len(self.user_ids)))}
+                    members = set(self.rng.sample(self.user_ids, min(around(self.rng, self.subscribers), len(self.user_ids)))) - authers
+                    writers += [Blog.authers.through(blog_id=blog.pk, user_id=user_id) for user_id in sorted(authers)]
+                    subscribers += [Subscriber(blog_id=blog.pk, user_id=user_id) for user_id in sorted(members)]
+                    if blog.is_private:
+                        # a few pending requests of users not in the blog
+                        applicants = set(self.rng.sample(self.user_ids, min(around(self.rng, 2), len(self.user_ids)))) - authers - members
+                        requests += [SubscribeRequest(blog_id=blog.pk, user_id=user_id) for user_id in sorted(applicants)]
+                    self.blog_members[blog.pk] = (blog.is_private, blog.owner_id, sorted(authers), sorted(members))
+                Blog.authers.through.objects.bulk_create(writers)
+                Subscriber.objects.bulk_create(subscribers)
+                SubscribeRequest.objects.bulk_create(requests)
+            yield 'blogs', end, total
+
+    def seed_posts(self):
+        # a pool of bodies, each parsed once
+        bodies = [rich_html(self.rng, self.rng.randint(2, 12)) for _ in range(64)]
+        bodies = [(body, derive_content(body)) for body in bodies]
+        self.content_type = ContentType.objects.get_for_model(Post)
+        self.next_comment_id = (Comment.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        blog_ids = sorted(self.blog_members)
+        total = self.counts['posts']
+        planned = {'comments': total * self.comments, 'likes': total * self.likes}
+        written = {'comments': 0, 'likes': 0}
+        for start, end in self.batches(total):
+            with transaction.atomic():
+                posts, likers = [], []
+                for number in range(start, end):
+                    blog_id = self.rng.choice(blog_ids)
+                    is_private, owner_id, authers, members = self.blog_members[blog_id]
+                    body, derived = self.rng.choice(bodies)
+                    post = Post(
+                        blog_id=blog_id, author_id=self.rng.choice(authers), title=sentence(self.rng, 6),
+                        slug=f'{self.prefix}-p{number}', content=body, is_published=self.rng.random() >= self.draft_ratio,
+                        **derived,
+                    )
+                    # private blogs: owner, post author and subscribers may like
+                    candidates = sorted({owner_id, post.author_id, *members}) if is_private else self.user_ids
+                    likers.append(self.rng.sample(candidates, min(around(self.rng, self.likes), len(candidates))))
+                    post.likes = len(likers[-1])
+                    posts.append(post)
+                Post.objects.bulk_create(posts)
+                Like.objects.bulk_create(
+                    [Like(post_id=post.pk, user_id=user_id) for post, users in zip(posts, likers) for user_id in users],
+                    batch_size=self.batch_size,
+                )
+                tag_names = self.seed_post_tags(posts)
+                index_posts(posts, tag_names)
+                self.fan_out(posts, tag_names)
+                written['comments'] += self.seed_comments(posts)
+            written['likes'] += sum(len(users) for users in likers)
+            yield 'posts', end, total
+            yield 'comments', written['comments'], planned['comments']
+            yield 'likes', written['likes'], planned['likes']
+
+    def seed_post_tags(self, posts):
+        tag_names = {post.pk: self.rng.sample(TAG_NAMES, self.rng.randint(1, 4)) for post in posts}
+        TaggedItem.objects.bulk_create([
+            TaggedItem(content_type=self.content_type, object_id=pk, tag_id=self.taggit_ids[name])
+            for pk, names in tag_names.items() for name in names
+        ], batch_size=self.batch_size)
+        return tag_names
+
+    def fan_out(self, posts, tag_names):
+        # the feeds of blog subscribers and tag followers, as the post_save and m2m_changed receivers would
+        limit = fanout_limit()
+        entries = []
+        for post in posts:
+            if not post.is_published:
+                continue
+            members = self.blog_members[post.blog_id][3]
+            user_ids = set(members) if len(members) <= limit else set()
+            for name in tag_names[post.pk]:
+                user_ids.update(self.tag_followers.get(name, ()))
+            if user_ids:
+                entries.append((post, sorted(user_ids)))
+        get_feed_store().add_many(entries)
+
+    def seed_comments(self, posts):
+        # a random tree per post; ids are assigned here, so paths are known before the single insert
+        comments, comment_likers = [], []
+        for post in posts:
+            is_private, owner_id, authers, members = self.blog_members[post.blog_id]
+            candidates = sorted({owner_id, *authers, *members}) if is_private else self.user_ids
+            thread = []
+            for _ in range(around(self.rng, self.comments)):
+                parent = self.rng.choice(thread) if thread and self.rng.random() < 0.5 else None
+                comment = Comment(
+                    id=self.next_comment_id, post_id=post.pk, author_id=self.rng.choice(candidates),
+                    content=sentence(self.rng, 20), reply_to=parent,
+                )
+                self.next_comment_id += 1
+                comment.path = (parent.path if parent else '') + comment_path_segment(comment.pk)
+                comment.root_id = parent.root_id if parent else comment.pk
+                if self.rng.random() < 0.3:
+                    users = self.rng.sample(candidates, min(around(self.rng, 2), len(candidates)))
+                    comment.likes = len(users)
+                    comment_likers.append((comment, users))
+                thread.append(comment)
+            comments += thread
+        Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+        LikeComment.objects.bulk_create(
+            [LikeComment(comment_id=comment.pk, user_id=user_id) for comment, users in comment_likers for user_id in users],
+            batch_size=self.batch_size,
+        )
+        return len(comments)
+
+    def finish(self):
+        # the id sequence continues after the explicitly numbered comments
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Comment]):
+                cursor.execute(sql)
+        recount_blogs()
+        recount_tags(Tag.objects.filter(name__in=TAG_NAMES))
+        for model in (Blog, Post, Comment, Subscriber, Like, Tag, FollowTag):
+            bump_cache_version(model)
@@ -1,35 +1,64 @@
-from rest_framework.serializers import ModelSerializer,StringRelatedField
+from rest_framework.serializers import IntegerField,ListField,ModelSerializer,ReadOnlyField,Serializer,StringRelatedField
+from rest_framework.validators import UniqueTogetherValidator
 from .models import *
+from .sparse import SparseFieldsSerializerMixin
 from taggit.serializers import (TagListSerializerField,TaggitSerializer)
 
 
-class BlogSerializer(ModelSerializer):
-
+class BlogSerializer(SparseFieldsSerializerMixin, ModelSerializer):
+    property_columns = {'absolute_url': ('slug',)}
 
     class Meta:
         model = Blog
-        fields = ['id', 'title', 'slug', 'logo', 'description', 'created_at', 'is_active', 'is_private', 'owner', 'authers', 'posts_count', 'absolute_url']
+        fields = ['id', 'title', 'slug', 'logo', 'description', 'created_at', 'modified_at', 'is_active', 'is_private', 'owner', 'authers', 'posts_count', 'absolute_url']
+        read_only_fields = ['posts_count']
    
 
-class PostSerializer(TaggitSerializer,ModelSerializer):
+class PostSerializer(SparseFieldsSerializerMixin, TaggitSerializer,ModelSerializer):
     tags = TagListSerializerField()
+    # only present in search results
+    search_rank = ReadOnlyField()
+    search_headline = ReadOnlyField()
     class Meta:
         model = Post
-        fields = ['id', 'blog', 'author', 'title', 'slug', 'content', 'created_at', 'is_active', 'is_private','is_published', 'likes','tags']
+        fields = ['id', 'blog', 'author', 'title', 'slug', 'content', 'created_at', 'modified_at', 'is_active', 'is_private','is_published', 'likes','tags', 'excerpt', 'word_count', 'reading_time', 'images', 'search_rank', 'search_headline']
+        read_only_fields = ['likes']
     
 
-class CommentSerializer(ModelSerializer):
+class CommentSerializer(SparseFieldsSerializerMixin, ModelSerializer):
     likers = StringRelatedField(many=True)
     replies = StringRelatedField(many=True)
     class Meta:
         model = Comment
-        fields = ['id', 'post', 'author', 'content', 'created_at','likes','likers','replies']
+        fields = ['id', 'post', 'author', 'content', 'created_at', 'modified_at', 'likes','likers','replies']
+        read_only_fields = ['likes']
+
+
+class CommentNodeSerializer(ModelSerializer):
+    class Meta:
+        model = Comment
+        fields = ['id', 'post', 'author', 'reply_to', 'content', 'created_at', 'likes', 'depth']
+
+
+def nest_comments(comments):
+    """
+    Builds nested comment trees from comments ordered by path.
+    Every comment gets a 'replies' list; comments whose parent is not in the list are returned as roots.
+    """
+    nodes, roots = {}, []
+    for comment, data in zip(comments, CommentNodeSerializer(comments, many=True).data):
+        data['replies'] = []
+        nodes[comment.pk] = data
+        parent = nodes.get(comment.reply_to_id)
+        (parent['replies'] if parent is not None else roots).append(data)
+    return roots
 
 
 class SubscriberSerializer(ModelSerializer):
     class Meta:
         model = Subscriber
         fields = '__all__'
+        validators = [UniqueTogetherValidator(Subscriber.objects.all(), ['blog', 'user'])]
 
 
 class SubscribeRequestSerializer(ModelSerializer):
@@ -42,18 +71,21 @@ class LikeSerializer(ModelSerializer):
     class Meta:
         model = Like
         fields = '__all__'
+        validators = [UniqueTogetherValidator(Like.objects.all(), ['post', 'user'])]
 
 
 class LikeCommentSerializer(ModelSerializer):
     class Meta:
         model = LikeComment
         fields = '__all__'
+        validators = [UniqueTogetherValidator(LikeComment.objects.all(), ['comment', 'user'])]
 
 
 class SavedPostSerializer(ModelSerializer):
     class Meta:
         model = SavedPost
         fields = '__all__'
+        validators = [UniqueTogetherValidator(SavedPost.objects.all(), ['post', 'user'])]
 
 
 class TagSerializer(ModelSerializer):
@@ -61,12 +93,19 @@ class TagSerializer(ModelSerializer):
     class Meta:
         model = Tag
         fields = ['id', 'name', 'created_at', 'posts_count','followers_count','followers']
+        read_only_fields = ['posts_count', 'followers_count']
     
 
 class FollowTagSerializer(ModelSerializer):
     class Meta:
         model = FollowTag
         fields = '__all__'
+        validators = [UniqueTogetherValidator(FollowTag.objects.all(), ['tag', 'user'])]
+
+
+class BatchSerializer(Serializer):
+    # ids of the posts, comments or tags of a batch write, see blog_app/reactions.py
+    ids = ListField(child=IntegerField(min_value=1), allow_empty=False, max_length=500)
 
 
 class ReportSerializer(ModelSerializer):
@@ -79,7 +118,7 @@ class SeriesSerializer(ModelSerializer):
     class Meta:
         model = Series
         fields = '__all__'
-        read_only_fields = ['created_at']
+        read_only_fields = ['created_at', 'posts_count']
 
 
 class UserBadgeSerializer(ModelSerializer):
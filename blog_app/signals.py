@@ -0,0 +1,171 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from taggit.models import Tag as TaggitTag
+
+from .caching import bump_cache_versions_on_commit
+from .counters import recount_series
+from .feed import fan_out_to_subscribers, fan_out_to_tag_followers, is_feed_post, remove_blog_from_feed
+from .models import *
+from .search import forget_fts_table, remove_post_index, update_post_index
+
+"""
+    This file contains the signal receivers of the blog app:
+        - sync_post_tags: creates the Tag rows of new tag names and keeps Tag.posts_count in step with post tagging
+        - update_series_posts_count: keeps Series.posts_count in step with series posts
+        - update_post_search_tags / remove_post_search: keep the post search index in step
+        - forget_search_backend: the FTS table is looked up again after migrations
+        - fan_out_post / fan_out_post_tags / remove_unsubscribed_feed: keep the home feeds in step
+        - invalidate_cached_responses / invalidate_deleted_post_counters / invalidate_blog_authers /
+          invalidate_post_tags / invalidate_series_posts:
+          bump the response cache versions of changed models and objects
+        - touch_modified_at: m2m changes shown by posts and blogs update their modified_at
+"""
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def sync_post_tags(sender, instance, action, pk_set, **kwargs):
+    # taggit sends the ids of the tags actually added/removed, clear sends none
+    if action == 'pre_clear':
+        instance._cleared_tag_names = list(instance.tags.names())
+        return
+    if action == 'post_clear':
+        names, delta = instance.__dict__.pop('_cleared_tag_names', []), -1
+    elif action in ('post_add', 'post_remove') and pk_set:
+        names = list(TaggitTag.objects.filter(pk__in=pk_set).values_list('name', flat=True))
+        delta = 1 if action == 'post_add' else -1
+    else:
+        return
+    if not names:
+        return
+    if delta > 0:
+        Tag.objects.ensure(names)
+    Tag.objects.filter(name__in=names).update(posts_count=F('posts_count') + delta)
+
+
+@receiver(m2m_changed, sender=Series.posts.through)
+def update_series_posts_count(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._cleared_series_ids = list(instance.series_posts.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        recount_series(Series.objects.filter(pk=instance.pk))
+    elif action == 'post_clear':
+        recount_series(Series.objects.filter(pk__in=instance.__dict__.pop('_cleared_series_ids', [])))
+    elif pk_set:
+        recount_series(Series.objects.filter(pk__in=pk_set))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_post_search_tags(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        update_post_index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_search(sender, instance, **kwargs):
+    remove_post_index(instance.pk)
+
+
+@receiver(post_migrate)
+def forget_search_backend(sender, **kwargs):
+    # migrations create or drop the SQLite FTS table
+    forget_fts_table()
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, **kwargs):
+    if is_feed_post(instance) and not getattr(instance, '_in_feeds', False):
+        # a published draft already has its tags, fan_out_post_tags only sees tags added afterwards
+        publishing = not kwargs.get('created')
+        transaction.on_commit(lambda: fan_out_published(instance, publishing))
+    instance._in_feeds = is_feed_post(instance)
+
+
+def fan_out_published(post, publishing):
+    fan_out_to_subscribers(post)
+    if publishing:
+        fan_out_to_tag_followers(post, list(post.tags.names()))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def fan_out_post_tags(sender, instance, action, pk_set, **kwargs):
+    if action == 'post_add' and pk_set and is_feed_post(instance):
+        names = list(TaggitTag.objects.filter(pk__in=pk_set).values_list('name', flat=True))
+        transaction.on_commit(lambda: fan_out_to_tag_followers(instance, names))
+
+
+@receiver(post_delete, sender=Subscriber)
+def remove_unsubscribed_feed(sender, instance, **kwargs):
+    remove_blog_from_feed(instance.user_id, instance.blog_id)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+@receiver(m2m_changed, sender=Blog.authers.through)
+def touch_modified_at(sender, instance, action, reverse, **kwargs):
+    # the ETags of PostDetail and BlogDetail are built on modified_at
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, (Post, Blog)):
+        type(instance).objects.filter(pk=instance.pk).update(modified_at=timezone.now())
+
+
+# senders whose saves and deletes invalidate cached responses, and the cache versions they bump:
+# models (their lists) or (model, pk) pairs (the details of one object)
+CACHE_INVALIDATION = {
+    Blog: lambda blog: [Blog, (Blog, blog.pk)],
+    # a post moved to another blog also changes the posts_count of the blog it was loaded from
+    Post: lambda post: [Post, (Post, post.pk), (Blog, post.blog_id), (Blog, getattr(post, '_loaded_blog_id', post.blog_id))],
+    Tag: lambda tag: [Tag],
+    FollowTag: lambda follow: [FollowTag],
+    Series: lambda series: [Series],
+    Subscriber: lambda subscriber: [Subscriber, (Blog, subscriber.blog_id)],
+    Like: lambda like: [Like, (Post, like.post_id)],
+}
+
+
+def invalidate_cached_responses(sender, instance, **kwargs):
+    bump_cache_versions_on_commit(CACHE_INVALIDATION[sender](instance))
+
+
+for sender in CACHE_INVALIDATION:
+    post_save.connect(invalidate_cached_responses, sender=sender)
+    post_delete.connect(invalidate_cached_responses, sender=sender)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post_counters(sender, instance, **kwargs):
+    # Post.delete lowers the counters of its tags and series with update(), which sends no signals
+    bump_cache_versions_on_commit([Tag, Series])
+
+
+@receiver(m2m_changed, sender=Blog.authers.through)
+def invalidate_blog_authers(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._cleared_blog_ids = list(instance.blog_writers.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        # the blog may have memoized users as (not) authors, see Blog.membership
+        instance.forget_membership()
+        blog_ids = [instance.pk]
+    elif action == 'post_clear':
+        blog_ids = instance.__dict__.pop('_cleared_blog_ids', [])
+    else:
+        blog_ids = pk_set or []
+    bump_cache_versions_on_commit([Blog, *((Blog, pk) for pk in blog_ids)])
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_post_tags(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_cache_versions_on_commit([Tag, (Post, instance.pk)])
+
+
+@receiver(m2m_changed, sender=Series.posts.through)
+def invalidate_series_posts(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_cache_versions_on_commit([Series])
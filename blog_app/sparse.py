@@ -0,0 +1,59 @@
+from rest_framework.serializers import ListSerializer
+
+"""
+    This file contains the sparse fieldsets of read endpoints.
+    ?fields=a,b returns only the listed fields, ?exclude=a,b all fields but the listed ones.
+    The serializer mixin trims the output; the view mixin defers the model columns no remaining
+    field reads, so large columns (post content, search data) are not even loaded.
+    Only GET requests are trimmed: writes validate and return the whole resource.
+"""
+
+
+def field_list(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    return {field.strip() for field in value.split(',') if field.strip()}
+
+
+class SparseFieldsSerializerMixin:
+    # columns read by fields backed by model properties, e.g. {'absolute_url': ('slug',)}
+    property_columns = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        # nested serializers keep all their fields
+        top_level = self.parent is None or (isinstance(self.parent, ListSerializer) and self.parent.parent is None)
+        if request is None or request.method != 'GET' or not top_level:
+            return fields
+        only, exclude = field_list(request, 'fields'), field_list(request, 'exclude')
+        if only is not None:
+            fields = {name: field for name, field in fields.items() if name in only or name == 'id'}
+        if exclude is not None:
+            fields = {name: field for name, field in fields.items() if name not in exclude}
+        return fields
+
+    def get_columns(self):
+        # model fields read by the serializer
+        columns = set()
+        for field in self.fields.values():
+            source = field.source.split('.')[0]
+            columns.add(source)
+            columns.update(self.property_columns.get(source, ()))
+        return columns
+
+
+class SparseFieldsMixin:
+    # view mixin: GET querysets only load the columns the (trimmed) serializer reads
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        columns = self.get_serializer().get_columns()
+        # relations stay loaded, they are small and may be traversed with select_related
+        deferred = [
+            field.name for field in queryset.model._meta.concrete_fields
+            if not field.primary_key and not field.is_relation and field.name not in columns
+        ]
+        return queryset.defer(*deferred) if deferred else queryset
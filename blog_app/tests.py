@@ -1,3 +1,336 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from blur.testing import QueryBudgetMixin
+
+from .caching import response_cache
+from .models import *
+
+
+class BlogTestCase(TestCase):
+    # an owner writing for a public blog and a reader
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        cls.reader = User.objects.create_user('reader', password='password')
+        cls.blog = Blog.objects.create(owner=cls.owner, title='Blog', slug='blog', logo='blog/logos/blog.png')
+        cls.blog.authers.add(cls.owner)
+
+    def create_post(self, slug, blog=None, tags=(), **fields):
+        post = Post(blog=blog or self.blog, author=self.owner, title=slug, slug=slug, content='<p>content</p>', **fields)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+            if tags:
+                post.tags.add(*tags)
+        return post
+
+
+class FeedFanOutTests(BlogTestCase):
+    def follow(self, user, name):
+        FollowTag(tag=Tag.objects.get(name=name), user=user).save()
+
+    def test_published_post_reaches_tag_followers(self):
+        self.create_post('first', tags=['django'])
+        self.follow(self.reader, 'django')
+        post = self.create_post('second', tags=['django'])
+        self.assertTrue(FeedEntry.objects.filter(user=self.reader, post=post).exists())
+
+    def test_published_draft_reaches_tag_followers(self):
+        post = self.create_post('draft', tags=['django'], is_published=False)
+        self.follow(self.reader, 'django')
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader, post=post).exists())
+        post.is_published = True
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        self.assertTrue(FeedEntry.objects.filter(user=self.reader, post=post).exists())
+
+    def test_published_draft_reaches_subscribers(self):
+        Subscriber.objects.create(blog=self.blog, user=self.reader)
+        post = self.create_post('draft', is_published=False)
+        post.is_published = True
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader, post=post).count(), 1)
+
+
+class FeedListTests(BlogTestCase):
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def read_feed(self, limit=2):
+        # the post ids of every page, following the next links
+        ids, url = [], reverse('blog_app:feed') + f'?limit={limit}'
+        while url:
+            data = self.client.get(url).json()
+            ids += [post['id'] for post in data['results']]
+            url = data['next']
+        return ids
+
+    def test_pages_newest_first(self):
+        Subscriber.objects.create(blog=self.blog, user=self.reader)
+        posts = [self.create_post(f'post-{number}') for number in range(5)]
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(), 5)
+        self.assertEqual(self.read_feed(), [post.pk for post in reversed(posts)])
+
+    @override_settings(FEED_STORE='blog_app.feed.CacheFeedStore')
+    def test_cache_store_pages_newest_first(self):
+        caches['default'].delete(f'feed:{self.reader.pk}')
+        Subscriber.objects.create(blog=self.blog, user=self.reader)
+        posts = [self.create_post(f'post-{number}') for number in range(5)]
+        self.assertEqual(self.read_feed(), [post.pk for post in reversed(posts)])
+
+    def test_big_blogs_merged_on_read(self):
+        other = Blog.objects.create(owner=self.owner, title='Other', slug='other', logo='blog/logos/other.png')
+        other.authers.add(self.owner)
+        Subscriber.objects.create(blog=self.blog, user=self.reader)
+        fanned_out = [self.create_post('fanned-out-1'), self.create_post('fanned-out-2')]
+        Subscriber.objects.create(blog=other, user=self.reader)
+        with override_settings(FEED_FANOUT_LIMIT=0):
+            merged = self.create_post('merged', blog=other)
+            self.assertEqual(self.read_feed(), [merged.pk, fanned_out[1].pk, fanned_out[0].pk])
+
+    def test_unpublished_posts_skipped(self):
+        Subscriber.objects.create(blog=self.blog, user=self.reader)
+        posts = [self.create_post(f'post-{number}') for number in range(4)]
+        Post.objects.filter(pk__in=[posts[1].pk, posts[2].pk]).update(is_published=False)
+        self.assertEqual(self.read_feed(limit=1), [posts[3].pk, posts[0].pk])
+
+    @override_settings(FEED_PAGE_ROUNDS=1)
+    def test_skipped_posts_continue_on_the_next_page(self):
+        Subscriber.objects.create(blog=self.blog, user=self.reader)
+        posts = [self.create_post(f'post-{number}') for number in range(6)]
+        Post.objects.filter(pk__in=[post.pk for post in posts[1:5]]).update(is_active=False)
+        self.assertEqual(self.read_feed(), [posts[5].pk, posts[0].pk])
+
+    def test_unsubscribing_keeps_followed_tag_posts(self):
+        subscription = Subscriber.objects.create(blog=self.blog, user=self.reader)
+        first = self.create_post('first', tags=['django'])
+        FollowTag(tag=Tag.objects.get(name='django'), user=self.reader).save()
+        tagged, untagged = self.create_post('tagged', tags=['django']), self.create_post('untagged')
+        self.assertEqual(self.read_feed(), [untagged.pk, tagged.pk, first.pk])
+        subscription.delete()
+        self.assertEqual(self.read_feed(), [tagged.pk, first.pk])
+
+
+class PostAuthorTests(BlogTestCase):
+    def test_added_author_can_post(self):
+        writer = User.objects.create_user('writer', password='password')
+        post = Post(blog=self.blog, author=writer, title='post', slug='post', content='<p>content</p>')
+        with self.assertRaisesMessage(Exception, 'Author is not in blog authers'):
+            post.save()
+        self.blog.authers.add(writer)
+        post.save()
+        self.assertTrue(Post.objects.filter(pk=post.pk).exists())
+
+
+class BlogPostsCountTests(BlogTestCase):
+    def posts_count(self, blog):
+        blog.refresh_from_db(fields=['posts_count'])
+        return blog.posts_count
+
+    def test_counts_added_and_deleted_posts(self):
+        post = self.create_post('first')
+        self.create_post('second')
+        self.assertEqual(self.posts_count(self.blog), 2)
+        post.delete()
+        self.assertEqual(self.posts_count(self.blog), 1)
+
+    def test_deleting_a_deleted_post_counts_once(self):
+        self.create_post('first')
+        post = self.create_post('deleted')
+        Post.objects.get(pk=post.pk).delete()
+        post.delete()
+        self.assertEqual(self.posts_count(self.blog), 1)
+
+    def test_moved_post_counted_in_its_new_blog(self):
+        other = Blog.objects.create(owner=self.owner, title='Other', slug='other', logo='blog/logos/other.png')
+        other.authers.add(self.owner)
+        self.create_post('first')
+        post = Post.objects.get(pk=self.create_post('moved').pk)
+        post.blog = other
+        post.save()
+        self.assertEqual((self.posts_count(self.blog), self.posts_count(other)), (1, 1))
+        post.save()
+        self.assertEqual((self.posts_count(self.blog), self.posts_count(other)), (1, 1))
+
+
+class PostVisibilityTests(BlogTestCase):
+    def setUp(self):
+        self.private = Blog.objects.create(owner=self.owner, title='Private', slug='private', logo='blog/logos/private.png', is_private=True)
+        self.private.authers.add(self.owner)
+        self.public_post, self.private_post = self.create_post('public'), self.create_post('private', blog=self.private)
+        self.stranger = User.objects.create_user('stranger', password='password')
+
+    def visible(self, user):
+        return set(Post.objects.visible_to(user).values_list('pk', flat=True))
+
+    def test_private_posts_hidden_from_strangers(self):
+        self.assertEqual(self.visible(self.stranger), {self.public_post.pk})
+
+    def test_private_posts_visible_to_owner_authors_and_subscribers(self):
+        writer = User.objects.create_user('writer', password='password')
+        self.private.authers.add(writer)
+        Subscriber.objects.create(blog=self.private, user=self.reader)
+        for user in (self.owner, writer, self.reader):
+            self.assertEqual(self.visible(user), {self.public_post.pk, self.private_post.pk})
+
+    def test_visible_comments_follow_their_posts(self):
+        public = Comment.objects.create(post=self.public_post, author=self.owner, content='public')
+        Comment.objects.create(post=self.private_post, author=self.owner, content='private')
+        self.assertEqual(list(Comment.objects.visible_to(self.stranger)), [public])
+
+
+class ReactionCounterTests(BlogTestCase):
+    def setUp(self):
+        self.client.force_login(self.reader)
+        self.post = self.create_post('post', tags=['django'])
+
+    def counter(self, instance, name):
+        instance.refresh_from_db(fields=[name])
+        return getattr(instance, name)
+
+    def test_like_toggle_counts_once(self):
+        url = reverse('blog_app:like_toggle', args=[self.post.pk])
+        self.client.put(url)
+        self.client.put(url)
+        self.assertEqual(self.counter(self.post, 'likes'), 1)
+        self.client.delete(url)
+        self.client.delete(url)
+        self.assertEqual(self.counter(self.post, 'likes'), 0)
+
+    def test_like_batch_counts_new_likes(self):
+        other = self.create_post('other')
+        Like.objects.create(post=self.post, user=self.reader)
+        Post.objects.filter(pk=self.post.pk).update(likes=1)
+        response = self.client.post(reverse('blog_app:like_batch'), {'ids': [self.post.pk, other.pk, other.pk + 1]}, content_type='application/json')
+        self.assertEqual([result['status'] for result in response.json()['results']], ['exists', 'created', 'not_found'])
+        self.assertEqual((self.counter(self.post, 'likes'), self.counter(other, 'likes')), (1, 1))
+        self.client.delete(reverse('blog_app:like_batch'), {'ids': [self.post.pk, other.pk]}, content_type='application/json')
+        self.assertEqual((self.counter(self.post, 'likes'), self.counter(other, 'likes')), (0, 0))
+
+    def test_deleting_a_deleted_like_counts_once(self):
+        like = Like.objects.create(post=self.post, user=self.reader)
+        Like.objects.get(pk=like.pk).delete()
+        like.delete()
+        self.assertEqual(self.counter(self.post, 'likes'), 0)
+
+    def test_subscription_toggle_counts_subscribers(self):
+        self.client.put(reverse('blog_app:subscription_toggle', args=[self.blog.pk]))
+        self.assertEqual(self.counter(self.blog, 'subscribers_count'), 1)
+        self.client.delete(reverse('blog_app:subscription_toggle', args=[self.blog.pk]))
+        self.assertEqual(self.counter(self.blog, 'subscribers_count'), 0)
+
+    def test_tag_counters(self):
+        tag = Tag.objects.get(name='django')
+        self.assertEqual(self.counter(tag, 'posts_count'), 1)
+        self.client.put(reverse('blog_app:follow_tag_toggle', args=[tag.pk]))
+        self.assertEqual(self.counter(tag, 'followers_count'), 1)
+        self.post.tags.clear()
+        self.assertEqual(self.counter(tag, 'posts_count'), 0)
+
+
+class QueryBudgetTests(QueryBudgetMixin, BlogTestCase):
+    # the queries of an endpoint must not grow with the rows it shows: every list below shows several rows
+    query_budgets = {
+        'blog_app:blogs': 5,
+        'blog_app:posts': 5,
+        'blog_app:post_detail': 5,
+        'blog_app:comments': 7,
+        'blog_app:post_comments': 5,
+        'blog_app:comment_thread': 4,
+        'blog_app:feed': 7,
+        'blog_app:tags': 5,
+        'blog_app:like_toggle': 8,
+        'blog_app:like_batch': 9,
+        'blog_app:subscription_toggle': 9,
+        'blog_app:follow_tag_toggle': 8,
+        'blog_app:async_blogs': 5,
+        'blog_app:async_posts': 5,
+        'blog_app:async_post_detail': 5,
+        'blog_app:async_comments': 7,
+    }
+
+    def setUp(self):
+        response_cache().clear()
+        self.client.force_login(self.reader)
+        Subscriber.objects.create(blog=self.blog, user=self.reader)
+        self.posts = [self.create_post(f'post-{number}', tags=['django', f'tag-{number}']) for number in range(5)]
+        FollowTag(tag=Tag.objects.get(name='django'), user=self.owner).save()
+        for post in self.posts:
+            Like.objects.create(post=post, user=self.owner)
+            for number in range(3):
+                comment = Comment.objects.create(post=post, author=self.owner, content=f'comment {number}')
+                Comment.objects.create(post=post, author=self.reader, content='reply', reply_to=comment)
+                LikeComment.objects.create(comment=comment, user=self.owner)
+        for number in range(3):
+            blog = Blog.objects.create(owner=self.owner, title=f'Blog {number}', slug=f'blog-{number}', logo='blog/logos/blog.png')
+            blog.authers.add(self.owner, self.reader)
+
+    def assertReads(self, path):
+        response = self.assertWithinQueryBudget('get', path)
+        self.assertEqual(response.status_code, 200)
+
+    def test_lists(self):
+        post = self.posts[0]
+        for path in (
+            reverse('blog_app:blogs'), reverse('blog_app:posts'), reverse('blog_app:feed'), reverse('blog_app:tags'),
+            reverse('blog_app:comments') + f'?post={post.pk}', reverse('blog_app:post_comments', args=[post.pk]),
+            reverse('blog_app:comment_thread', args=[Comment.objects.filter(post=post).first().pk]),
+            reverse('blog_app:async_blogs'), reverse('blog_app:async_posts'),
+            reverse('blog_app:async_comments') + f'?post={post.pk}',
+        ):
+            self.assertReads(path)
+
+    def test_post_detail(self):
+        self.assertReads(reverse('blog_app:post_detail', args=[self.posts[0].pk]))
+        self.assertReads(reverse('blog_app:async_post_detail', args=[self.posts[1].pk]))
+
+    def test_toggles(self):
+        tag = Tag.objects.get(name='tag-0')
+        for path in (
+            reverse('blog_app:like_toggle', args=[self.posts[0].pk]),
+            reverse('blog_app:subscription_toggle', args=[self.blog.pk]),
+            reverse('blog_app:follow_tag_toggle', args=[tag.pk]),
+        ):
+            for method in ('put', 'delete'):
+                self.assertEqual(self.assertWithinQueryBudget(method, path).status_code, 204)
+        ids = {'ids': [post.pk for post in self.posts]}
+        for method in ('post', 'delete'):
+            response = self.assertWithinQueryBudget(method, reverse('blog_app:like_batch'), data=ids, content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+
+
+class ResponseCacheTests(BlogTestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.client.force_login(self.reader)
+
+    def posts_counts(self, name, key):
+        return {row[key]: row['posts_count'] for row in self.client.get(reverse(name)).json()['results']}
+
+    def test_deleted_post_leaves_tag_and_series_lists(self):
+        post = self.create_post('post', tags=['django'])
+        series = Series.objects.create(blog=self.blog, title='Series', slug='series')
+        with self.captureOnCommitCallbacks(execute=True):
+            series.posts.add(post)
+        self.assertEqual(self.posts_counts('blog_app:tags', 'name')['django'], 1)
+        self.assertEqual(self.posts_counts('blog_app:series', 'title')['Series'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+        self.assertEqual(self.posts_counts('blog_app:tags', 'name')['django'], 0)
+        self.assertEqual(self.posts_counts('blog_app:series', 'title')['Series'], 0)
+
+    def test_liked_post_is_modified_since(self):
+        post = self.create_post('post')
+        for name in ('blog_app:post_detail', 'blog_app:async_post_detail'):
+            url = reverse(name, args=[post.pk])
+            response = self.client.get(url)
+            self.assertNotIn('Last-Modified', response.headers)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.put(reverse('blog_app:like_toggle', args=[post.pk]))
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+            self.assertEqual((response.status_code, response.json()['likes']), (200, Like.objects.filter(post=post).count()))
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.delete(reverse('blog_app:like_toggle', args=[post.pk]))
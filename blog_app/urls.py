@@ -1,4 +1,5 @@
 from blog_app.views import *
+from blog_app.async_views import AsyncBlogList, AsyncCommentList, AsyncPostDetail, AsyncPostList
 from django.urls import path
 
 app_name = 'blog_app'
@@ -7,21 +8,38 @@ urlpatterns = [
     path('blog/<int:pk>', BlogDetail.as_view(), name='blog_detail'),
     path('post', PostList.as_view(), name='posts'),
     path('post/<int:pk>', PostDetail.as_view(), name='post_detail'),
+    path('feed', FeedList.as_view(), name='feed'),
     path('comment', CommentList.as_view(), name='comments'),
     path('comment/<int:pk>', CommentDetail.as_view(), name='comment_detail'),
+    path('post/<int:pk>/comments', PostCommentThread.as_view(), name='post_comments'),
+    path('comment/<int:pk>/thread', CommentThread.as_view(), name='comment_thread'),
     path('subscriber', SubscriberList.as_view(), name='subscribers'),
     path('subscriber/<int:pk>', SubscriberDetail.as_view(), name='subscriber_detail'),
+    path('subscribe/<int:pk>', SubscriptionToggle.as_view(), name='subscription_toggle'),
     path('subscribe_request', SubscribeRequestList.as_view(), name='subscribe_requests'),
     path('subscribe_request/<int:pk>', SubscribeRequestDetail.as_view(), name='subscribe_request_detail'),
     path('like', LikeList.as_view(), name='likes'),
+    path('like/<int:pk>', LikeToggle.as_view(), name='like_toggle'),
+    path('like/batch', LikeBatch.as_view(), name='like_batch'),
     path('like-comment', LikeCommentList.as_view(), name='like_comments'),
+    path('like-comment/<int:pk>', LikeCommentToggle.as_view(), name='like_comment_toggle'),
+    path('like-comment/batch', LikeCommentBatch.as_view(), name='like_comment_batch'),
     path('saved-post', SavedPostList.as_view(), name='saved_posts'),
+    path('saved-post/<int:pk>', SavedPostToggle.as_view(), name='saved_post_toggle'),
+    path('saved-post/batch', SavedPostBatch.as_view(), name='saved_post_batch'),
     path('tag', TagList.as_view(), name='tags'),
     path('follow-tag', FollowTagList.as_view(), name='follow_tags'),
+    path('follow-tag/<int:pk>', FollowTagToggle.as_view(), name='follow_tag_toggle'),
+    path('follow-tag/batch', FollowTagBatch.as_view(), name='follow_tag_batch'),
     path('report', ReportList.as_view(), name='reports'),
     path('report/<int:pk>', ReportDetail.as_view(), name='report_detail'),
     path('series', SeriesList.as_view(), name='series'),
     path('series/<int:pk>', SeriesDetail.as_view(), name='series_detail'),
     path('user-badges', UserBadgeList.as_view(), name='user_badges'),
     path('drafts', DraftList.as_view(), name='drafts'),
+    # async variants of the hot read endpoints, for ASGI deployments
+    path('async/blog', AsyncBlogList.as_view(), name='async_blogs'),
+    path('async/post', AsyncPostList.as_view(), name='async_posts'),
+    path('async/post/<int:pk>', AsyncPostDetail.as_view(), name='async_post_detail'),
+    path('async/comment', AsyncCommentList.as_view(), name='async_comments'),
 ]
\ No newline at end of file
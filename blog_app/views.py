@@ -1,21 +1,29 @@
 from rest_framework import generics, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .models import *
+from .caching import CachedResponseMixin, make_etag
+from .feed import FeedPagination, feed_posts
+from .pagination import KeysetPagination, ThreadCursorPagination
+from .reactions import BatchReactionView, ReactionMixin, ReactionToggleView
+from .search import search_posts
 from .serializers import *
+from .sparse import SparseFieldsMixin
 
 
 class PostCountOrder(filters.BaseFilterBackend):
+    # most posts first (indexed counter column); the ordering chosen by OrderingFilter is kept as tie-breaker
     def filter_queryset(self, request, queryset, view):
-        return sorted(queryset, key=lambda t: t.posts_count, reverse=True)
+        return queryset.order_by('-posts_count', *queryset.query.order_by)
 
 
-class BlogList(generics.ListCreateAPIView):
-    queryset = Blog.objects.all()
+class BlogList(CachedResponseMixin, SparseFieldsMixin, generics.ListCreateAPIView):
+    cache_models = (Blog, Post)
+    queryset = Blog.objects.prefetch_related('authers')
     serializer_class = BlogSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, PostCountOrder]
@@ -24,74 +32,170 @@ class BlogList(generics.ListCreateAPIView):
     ordering_fields = ['created_at', 'title']
 
 
-class BlogDetail(generics.RetrieveUpdateDestroyAPIView):
+class BlogDetail(CachedResponseMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Blog.objects.all()
     serializer_class = BlogSerializer
     permission_classes = [IsAuthenticated]
-        
+    cache_models = (Blog,)
+
+    def get_cache_scopes(self, request):
+        # the blog's own version, bumped by its posts too (posts_count)
+        return [(Blog, self.kwargs['pk'])]
+
+    def get_validators(self, request):
+        # the blog version without loading it: posts_count changes without touching modified_at,
+        # so there is no Last-Modified, only the ETag tells the versions apart
+        state = Blog.objects.filter(pk=self.kwargs['pk']).values('modified_at', 'posts_count').first()
+        if state is None:
+            return None
+        return make_etag(self.kwargs['pk'], state['modified_at'].isoformat(), state['posts_count']), None
+
 
-class PostList(generics.ListCreateAPIView):
+class PostSearchFilter(filters.SearchFilter):
+    # ranked full-text search over title, tags and the plain text of the content
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return search_posts(queryset, terms)
+
+
+class PostList(SparseFieldsMixin, generics.ListCreateAPIView):
     queryset = Post.objects.filter(is_active=True,blog__is_active=True,is_published=True)
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, PostSearchFilter, filters.OrderingFilter]
     filterset_fields = ['blog', 'author', 'is_active','tags__name']
-    search_fields = ['title', 'content']
     ordering_fields = ['created_at', 'title']
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        # remove posts from private blogs if user is not subscribed
-        for post in queryset:
-            if post.blog.is_private:
-                if not post.blog.subscribers.filter(user=request.user).exists():
-                    queryset = queryset.exclude(id=post.id)
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created_at', '-id')
 
+    def get_queryset(self):
+        # hide posts of private blogs the user can not read, as one SQL predicate
+        return super().get_queryset().visible_to(self.request.user).prefetch_related('tags')
 
-class PostDetail(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Post.objects.all()
+
+class PostDetail(CachedResponseMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Post.objects.select_related('blog')
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
+    cache_models = (Post, Blog)
+
+    def get_post_state(self, request):
+        # version and privacy of the post if the user can read it, in one query without the content
+        if not hasattr(self, '_post_state'):
+            self._post_state = Post.objects.visible_to(request.user).filter(pk=self.kwargs['pk']).values(
+                'modified_at', 'likes', 'blog_id', 'blog__is_private'
+            ).first()
+        return self._post_state
+
+    def get_cache_scopes(self, request):
+        # the post's version (likes bump it) and its blog's (subscriptions bump it)
+        return [(Post, self.kwargs['pk']), (Blog, self.get_post_state(request)['blog_id'])]
+
+    def get_visibility_class(self, request):
+        # posts of public blogs are cached once for everyone, posts of private blogs per reader
+        state = self.get_post_state(request)
+        if state is None:
+            return None
+        return f'user:{request.user.pk}' if state['blog__is_private'] else 'public'
+
+    def get_validators(self, request):
+        state = self.get_post_state(request)
+        if state is None:
+            return None
+        # likes change without touching modified_at, so as BlogDetail there is no Last-Modified
+        etag = make_etag(self.kwargs['pk'], state['modified_at'].isoformat(), state['likes'], self.get_visibility_class(request))
+        return etag, None
+
     def retrieve(self, request, *args, **kwargs):
-        # check if user is subscribed to this blog or blog is not private
+        # check if blog is not private or user is its owner, author or subscriber
         post = self.get_object()
-        if post.blog.is_private:
-            if not post.blog.subscribers.filter(user=request.user).exists():
-                raise ValidationError('This blog is private. make request to subscribe.')
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
+        if not post.blog.can_read(request.user):
+            raise ValidationError('This blog is private. make request to subscribe.')
+        serializer = self.get_serializer(post)
         return Response(serializer.data)
 
 
-class CommentList(generics.ListCreateAPIView):
-    queryset = Comment.objects.all()
+class FeedList(SparseFieldsMixin, generics.ListAPIView):
+    """
+    This view returns the home feed of the user: posts of subscribed blogs and followed tags,
+    newest first, paginated by cursor.
+    """
+    serializer_class = PostSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = FeedPagination
+
+    def get_queryset(self):
+        # the posts that may be shown, read by id for the keys of a page (blog_app/feed.py)
+        return feed_posts(self.request.user).prefetch_related('tags')
+
+
+class CommentList(SparseFieldsMixin, generics.ListCreateAPIView):
+    queryset = Comment.objects.with_likers_and_replies()
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['post', 'author']
     search_fields = ['content']
     ordering_fields = ['created_at']
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created_at', '-id')
 
 
-class CommentDetail(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Comment.objects.all()
+class CommentDetail(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Comment.objects.with_likers_and_replies()
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
 
 
+class PostCommentThread(generics.ListAPIView):
+    """
+    This view returns the discussion under a post as nested comment trees.
+    Pages are cursor based over the top-level comments; every page is loaded
+    with one query for its top-level comments and one for all their replies.
+    """
+    serializer_class = CommentNodeSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = ThreadCursorPagination
+
+    def get_queryset(self):
+        return Comment.objects.filter(post=self.kwargs['pk'], reply_to__isnull=True)
+
+    def list(self, request, *args, **kwargs):
+        if not Post.objects.visible_to(request.user).filter(pk=self.kwargs['pk']).exists():
+            raise NotFound()
+        page = self.paginate_queryset(self.get_queryset())
+        replies = Comment.objects.filter(root__in=[comment.pk for comment in page]).exclude(reply_to=None).order_by('path')
+        # replies ordered by path always come after their parent
+        return self.get_paginated_response(nest_comments(list(page) + list(replies)))
+
+
+class CommentThread(generics.GenericAPIView):
+    """
+    This view returns a comment with all of its replies, nested.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        # the place of the comment first, so its subtree is a range scan of (root, path) with a literal prefix
+        comment = Comment.objects.visible_to(request.user).filter(pk=pk).values('root_id', 'path').first()
+        if comment is None:
+            raise NotFound()
+        comments = list(Comment.objects.filter(root_id=comment['root_id'], path__startswith=comment['path']).order_by('path'))
+        return Response(nest_comments(comments)[0])
+
+
 class SubscriberList(generics.ListCreateAPIView):
     queryset = Subscriber.objects.all()
     serializer_class = SubscriberSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['blog', 'user']
-    search_fields = ['email']
-    ordering_fields = ['created_at']
+    search_fields = ['user__username']
+    ordering_fields = ['subscribed_at']
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-subscribed_at', '-id')
 
     def perform_create(self, serializer):
         # check blog is not private
@@ -107,6 +211,23 @@ class SubscriberDetail(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
 
+class SubscriptionToggle(ReactionToggleView):
+    """
+    This view subscribes (PUT) the user to a public blog or unsubscribes (DELETE) them;
+    repeated requests change nothing.
+    """
+    model = Subscriber
+    target_field = 'blog'
+    targets = Blog.objects.filter(is_private=False)
+    counter = 'subscribers_count'
+
+    def put(self, request, pk):
+        # check blog is not private
+        if Blog.objects.filter(pk=pk, is_private=True).exists():
+            raise ValidationError('This blog is private. make request to subscribe.')
+        return super().put(request, pk)
+
+
 class SubscribeRequestList(generics.ListCreateAPIView):
     queryset = SubscribeRequest.objects.all()
     serializer_class = SubscribeRequestSerializer
@@ -134,6 +255,27 @@ class LikeList(generics.ListCreateAPIView):
     filterset_fields = ['post', 'user']
     search_fields = ['user__username']
     ordering_fields = ['liked_at']
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-liked_at', '-id')
+
+
+class LikeReactions(ReactionMixin):
+    model = Like
+    target_field = 'post'
+    targets = staticmethod(Post.objects.visible_to)
+    counter = 'likes'
+
+
+class LikeToggle(LikeReactions, ReactionToggleView):
+    """
+    This view likes (PUT) or unlikes (DELETE) a post for the user; repeated requests change nothing.
+    """
+
+
+class LikeBatch(LikeReactions, BatchReactionView):
+    """
+    This view likes (POST) or unlikes (DELETE) a batch of posts for the user.
+    """
 
 
 class LikeCommentList(generics.ListCreateAPIView):
@@ -146,6 +288,25 @@ class LikeCommentList(generics.ListCreateAPIView):
     ordering_fields = ['liked_at']
 
 
+class LikeCommentReactions(ReactionMixin):
+    model = LikeComment
+    target_field = 'comment'
+    targets = staticmethod(Comment.objects.visible_to)
+    counter = 'likes'
+
+
+class LikeCommentToggle(LikeCommentReactions, ReactionToggleView):
+    """
+    This view likes (PUT) or unlikes (DELETE) a comment for the user; repeated requests change nothing.
+    """
+
+
+class LikeCommentBatch(LikeCommentReactions, BatchReactionView):
+    """
+    This view likes (POST) or unlikes (DELETE) a batch of comments for the user.
+    """
+
+
 class SavedPostList(generics.ListCreateAPIView):
     queryset = SavedPost.objects.all()
     serializer_class = SavedPostSerializer
@@ -156,13 +317,33 @@ class SavedPostList(generics.ListCreateAPIView):
     ordering_fields = ['saved_at']
 
 
+class SavedPostReactions(ReactionMixin):
+    model = SavedPost
+    target_field = 'post'
+    targets = staticmethod(Post.objects.visible_to)
+
+
+class SavedPostToggle(SavedPostReactions, ReactionToggleView):
+    """
+    This view saves (PUT) or unsaves (DELETE) a post for the user; repeated requests change nothing.
+    """
+
+
+class SavedPostBatch(SavedPostReactions, BatchReactionView):
+    """
+    This view saves (POST) or unsaves (DELETE) a batch of posts for the user.
+    """
+
+
 class TagsPostCountOrder(filters.BaseFilterBackend):
+    # most tagged posts first (indexed counter column); the ordering chosen by OrderingFilter is kept as tie-breaker
     def filter_queryset(self, request, queryset, view):
-        return sorted(queryset, key=lambda t: t.posts_count, reverse=True)
+        return queryset.order_by('-posts_count', *queryset.query.order_by)
     
 
-class TagList(generics.ListCreateAPIView):
-    queryset = Tag.objects.all()
+class TagList(CachedResponseMixin, generics.ListCreateAPIView):
+    cache_models = (Tag, FollowTag)
+    queryset = Tag.objects.with_followers()
     serializer_class = TagSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter,TagsPostCountOrder]
@@ -181,6 +362,25 @@ class FollowTagList(generics.ListCreateAPIView):
     ordering_fields = ['followed_at']
 
 
+class FollowTagReactions(ReactionMixin):
+    model = FollowTag
+    target_field = 'tag'
+    targets = Tag.objects.all()
+    counter = 'followers_count'
+
+
+class FollowTagToggle(FollowTagReactions, ReactionToggleView):
+    """
+    This view follows (PUT) or unfollows (DELETE) a tag for the user; repeated requests change nothing.
+    """
+
+
+class FollowTagBatch(FollowTagReactions, BatchReactionView):
+    """
+    This view follows (POST) or unfollows (DELETE) a batch of tags for the user.
+    """
+
+
 class ReportList(generics.ListCreateAPIView):
     queryset = Report.objects.all()
     serializer_class = ReportSerializer
@@ -197,12 +397,13 @@ class ReportDetail(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
 
-class SeriesList(generics.ListCreateAPIView):
+class SeriesList(CachedResponseMixin, generics.ListCreateAPIView):
+    cache_models = (Series,)
     queryset = Series.objects.all()
     serializer_class = SeriesSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['author', 'is_active']
+    filterset_fields = ['blog', 'is_active']
     search_fields = ['title']
     ordering_fields = ['created_at', 'title']
     def perform_create(self, serializer):
@@ -243,7 +444,10 @@ class DraftList(APIView):
         blog = request.query_params.get('blog', None)
         if blog is not None:
             # check if user is blog owner or in blog authors
-            if not request.user == Blog.objects.get(id=blog).owner and not request.user in Blog.objects.get(id=blog).authers.all():
+            blog = Blog.objects.filter(id=blog).only('owner').first()
+            if blog is None:
+                raise NotFound()
+            if not blog.is_owner(request.user) and not blog.is_author(request.user):
                 raise ValidationError('You are not the owner or author of this blog.')
             posts = Post.objects.filter(blog=blog,is_active=True,is_published=False)
             serializer = PostSerializer(posts, many=True)
@@ -0,0 +1,50 @@
+import json
+import math
+from collections import defaultdict
+
+"""
+    This file contains the helpers shared by the request metrics tools:
+    percentiles and the aggregation of the JSON lines written by blur.middleware.QueryMetricsMiddleware.
+"""
+
+
+def percentile(values, p):
+    # nearest-rank percentile of a list of numbers, None for an empty list
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def read_metrics(path):
+    with open(path) as log:
+        return [json.loads(line) for line in log if line.strip()]
+
+
+def summarize(records, key=lambda record: (record['view'], record['method'])):
+    """
+    Aggregates request records per key (URL name and method by default):
+    request count, p50/p95/p99 of the total time, p50/p95/max of the query count,
+    p95 of database and render time, and p50 of the response size.
+    """
+    groups = defaultdict(list)
+    for record in records:
+        groups[key(record)].append(record)
+    rows = []
+    for group, items in groups.items():
+        # streaming responses are logged with no size ("bytes": null), they are left out of its percentile
+        column = lambda name: [item[name] for item in items if item[name] is not None]
+        rows.append({
+            'key': group,
+            'requests': len(items),
+            'total_p50': percentile(column('total_ms'), 50),
+            'total_p95': percentile(column('total_ms'), 95),
+            'total_p99': percentile(column('total_ms'), 99),
+            'queries_p50': percentile(column('queries'), 50),
+            'queries_p95': percentile(column('queries'), 95),
+            'queries_max': max(column('queries')),
+            'db_p95': percentile(column('db_ms'), 95),
+            'render_p95': percentile(column('render_ms'), 95),
+            'bytes_p50': percentile(column('bytes'), 50),
+        })
+    return rows
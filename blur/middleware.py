@@ -0,0 +1,72 @@
+import json
+import threading
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+"""
+    This file contains the request metrics middleware.
+    When QUERY_METRICS_LOG is set, every request appends one JSON line to that file with its URL name,
+    method, status, number of SQL queries, database time, render (serialization to bytes) time,
+    total time and response size. The query_metrics command aggregates the log per URL name.
+    Without the setting the middleware removes itself at startup.
+"""
+
+
+class QueryMetricsMiddleware:
+    def __init__(self, get_response):
+        self.path = getattr(settings, 'QUERY_METRICS_LOG', None)
+        if not self.path:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        request._query_metrics = metrics = {'queries': 0, 'db': 0.0, 'render': 0.0}
+
+        def timed_execute(execute, sql, params, many, context):
+            start = perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                metrics['queries'] += 1
+                metrics['db'] += perf_counter() - start
+
+        start = perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timed_execute))
+            response = self.get_response(request)
+        total = perf_counter() - start
+        self.write({
+            'time': timezone.now().isoformat(),
+            'view': request.resolver_match.view_name if request.resolver_match else request.path,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': metrics['queries'],
+            'db_ms': round(metrics['db'] * 1000, 3),
+            'render_ms': round(metrics['render'] * 1000, 3),
+            'total_ms': round(total * 1000, 3),
+            'bytes': len(response.content) if not response.streaming else None,
+        })
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns, measured from here to the post-render callback
+        start = perf_counter()
+
+        def rendered(response):
+            request._query_metrics['render'] += perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def write(self, record):
+        line = json.dumps(record) + '\n'
+        with self.lock, open(self.path, 'a') as log:
+            log.write(line)
@@ -41,8 +41,13 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blur.middleware.QueryMetricsMiddleware',
 ]
 
+# file the request metrics (queries, DB time, latency) are appended to, unset to disable them;
+# aggregate with `python manage.py query_metrics`
+QUERY_METRICS_LOG = env('QUERY_METRICS_LOG', default=None)
+
 ROOT_URLCONF = 'blur.urls'
 
 TEMPLATES = [
@@ -98,6 +103,30 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# password hashing policy of new hashes: pbkdf2, scrypt or argon2 (needs argon2-cffi), and the costs of each;
+# hashes of another policy or with other costs still verify and are rehashed on login (user_app/hashers.py)
+PASSWORD_HASH_POLICY = env('PASSWORD_HASH_POLICY', default='pbkdf2')
+PASSWORD_HASH_POLICIES = {
+    'pbkdf2': 'user_app.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'user_app.hashers.ScryptPasswordHasher',
+    'argon2': 'user_app.hashers.Argon2PasswordHasher',
+}
+# the policy's hasher first, then the other policies' and the rest of Django's defaults
+# (an unknown policy keeps the pbkdf2 hasher first, the user_app.E001 check reports it)
+PASSWORD_HASHERS = [
+    *(path for name, path in sorted(PASSWORD_HASH_POLICIES.items(), key=lambda item: item[0] != PASSWORD_HASH_POLICY)),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PASSWORD_HASH_COSTS = {
+    'pbkdf2': {'iterations': env.int('PASSWORD_PBKDF2_ITERATIONS', default=600000)},
+    'scrypt': {'work_factor': env.int('PASSWORD_SCRYPT_WORK_FACTOR', default=2 ** 14), 'block_size': 8, 'parallelism': 1},
+    'argon2': {'time_cost': 2, 'memory_cost': env.int('PASSWORD_ARGON2_MEMORY_KIB', default=102400), 'parallelism': 8},
+}
+
+# threads the async login view checks password hashes in, i.e. logins verified at once
+PASSWORD_HASH_WORKERS = env.int('PASSWORD_HASH_WORKERS', default=os.cpu_count() or 1)
+
 TAGGIT_STRIP_UNICODE_WHEN_SLUGIFYING = True
 
 LANGUAGE_CODE = 'en-us'
@@ -115,13 +144,45 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 CKEDITOR_UPLOAD_PATH = 'uploads'
 
+# media files dropped by posts and blogs are deleted by a background thread in batches of MEDIA_GC_BATCH_SIZE,
+# or right after the transaction commits with MEDIA_GC_SYNC
+MEDIA_GC_BATCH_SIZE = 100
+MEDIA_GC_SYNC = env.bool('MEDIA_GC_SYNC', default=False)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_ALLOW_CREDENTIALS = True
 
 REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+        'user_app.authentication.JWTAuthentication',
+    ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 20
-}
\ No newline at end of file
+}
+
+# cache backend, e.g. locmemcache://, filecache:///var/tmp/blur or rediscache://127.0.0.1:6379/1
+CACHES = {'default': env.cache('CACHE_URL', default='locmemcache://')}
+
+# cache of read endpoint responses (blog_app/caching.py), and how long an entry lives at most
+RESPONSE_CACHE = 'default'
+RESPONSE_CACHE_TIMEOUT = env.int('RESPONSE_CACHE_TIMEOUT', default=300)
+
+# refresh tokens (sessions) kept per user, the oldest are revoked on login; 0 for no limit
+MAX_SESSIONS_PER_USER = env.int('MAX_SESSIONS_PER_USER', default=10)
+
+# the token claims of users (no other field) are read from this cache when an access token is refreshed,
+# set the timeout to 0 to always read them from the database
+JWT_USER_CACHE = 'default'
+JWT_USER_CACHE_TIMEOUT = env.int('JWT_USER_CACHE_TIMEOUT', default=60)
+
+# home feeds: where fanned-out post ids are kept (blog_app.feed.DatabaseFeedStore or blog_app.feed.CacheFeedStore)
+# and the number of subscribers/followers above which posts are merged into feeds on read instead
+FEED_STORE = env('FEED_STORE', default='blog_app.feed.DatabaseFeedStore')
+FEED_FANOUT_LIMIT = env.int('FEED_FANOUT_LIMIT', default=10000)
+# rounds of keys a feed page reads past posts that can no longer be shown, before it is returned short
+FEED_PAGE_ROUNDS = env.int('FEED_PAGE_ROUNDS', default=5)
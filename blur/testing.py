@@ -0,0 +1,41 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+"""
+    This file contains test helpers for query budgets: the maximum number of SQL queries
+    an endpoint may issue, so N+1 regressions fail in tests instead of showing up in production.
+
+        class PostApiTests(QueryBudgetMixin, APITestCase):
+            query_budgets = {'blog_app:posts': 6, 'blog_app:post_detail': 5}
+
+            def test_post_list(self):
+                self.assertWithinQueryBudget('get', '/api/blog/post?limit=50')
+"""
+
+
+@contextmanager
+def query_budget(limit, using=DEFAULT_DB_ALIAS):
+    # fails when the block runs more than limit queries, listing them
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    if len(context) > limit:
+        queries = '\n'.join(f'{number}. {query["sql"]}' for number, query in enumerate(context.captured_queries, 1))
+        raise AssertionError(f'{len(context)} queries executed, the budget is {limit}:\n{queries}')
+
+
+class QueryBudgetMixin:
+    # maximum queries per URL name, for test cases with a test client
+    query_budgets = {}
+
+    def assertWithinQueryBudget(self, method, path, budget=None, **kwargs):
+        if budget is None:
+            view_name = resolve(path.split('?', 1)[0]).view_name
+            if view_name not in self.query_budgets:
+                raise AssertionError(f'No query budget for {view_name}')
+            budget = self.query_budgets[view_name]
+        with query_budget(budget):
+            response = getattr(self.client, method)(path, **kwargs)
+        return response
@@ -0,0 +1,64 @@
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .authentication import create_access_token, create_refresh_token
+from .hashers import averify_password
+from .models import UserToken
+from .views import LoginAPIView
+
+"""
+    This file contains the async (ASGI native) variant of the login endpoint, served under auth/async/.
+    The password hash is checked in the bounded thread pool of user_app/hashers.py instead of the single
+    thread sync views share under ASGI, so concurrent logins are verified in parallel.
+"""
+
+
+# csrf exempt as every DRF view, login takes no session
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLoginView(View):
+    """
+    This view is the async variant of LoginAPIView, with the same request data and responses.
+    The user is read and its hash upgraded with the async ORM, the session is stored in a worker thread.
+    """
+    http_method_names = ['post', 'options']
+
+    async def post(self, request, *args, **kwargs):
+        # the DRF view parses the request and renders responses and errors, as LoginAPIView would
+        view = LoginAPIView(renderer_classes=[JSONRenderer])
+        view.setup(request, *args, **kwargs)
+        view.request = view.initialize_request(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+        try:
+            response = await self.login(view.request)
+        except exceptions.APIException as exc:
+            response = view.handle_exception(exc)
+        response = view.finalize_response(view.request, response)
+        return response.render()
+
+    async def login(self, request):
+        username = request.data['username']
+        password = request.data['password']
+        user = await User.objects.filter(username=username).afirst()
+        if user is None:
+            raise exceptions.AuthenticationFailed('Invalid username')
+        valid, rehashed = await averify_password(password, user.password)
+        if not valid:
+            raise exceptions.AuthenticationFailed('Invalid password')
+        if rehashed:
+            user.password = rehashed
+            await user.asave(update_fields=['password'])
+        access_token = create_access_token(user)
+        refresh_token = create_refresh_token(user.id)
+        await sync_to_async(UserToken.objects.issue)(user.id, refresh_token, timezone.now() + datetime.timedelta(days=7))
+        response = Response({'token': access_token})
+        response.set_cookie(key='refresh_token', value=refresh_token, httponly=True)
+        return response
@@ -1,4 +1,7 @@
+import uuid
 import jwt, datetime
+from django.conf import settings
+from django.core.cache import caches
 from rest_framework import exceptions
 from rest_framework.authentication import BaseAuthentication, get_authorization_header
 from django.contrib.auth.models import User
@@ -8,46 +11,102 @@ from django.contrib.auth.models import User
     It contains the following functions:
         - create_access_token
         - decode_access_token
+        - decode_access_payload
         - create_refresh_token
         - decode_refresh_token
+        - get_cached_user
+        - invalidate_cached_user
+        - claims_user
         - JWTAuthentication
 """
 
+# user fields carried by access tokens, so most requests never load the user row
+ACCESS_TOKEN_CLAIMS = ('username', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser')
+
+
+def claims_user(claims):
+    """
+    A User holding only the id and the ACCESS_TOKEN_CLAIMS fields of claims, as loaded by .only():
+    any other field is read from the database when it is first accessed.
+    """
+    names = ['id', *(name for name in ACCESS_TOKEN_CLAIMS if name in claims)]
+    fields = [field for field in User._meta.concrete_fields if field.attname in names]
+    values = [claims['user_id'] if field.attname == 'id' else claims[field.attname] for field in fields]
+    return User.from_db(User.objects.db, [field.attname for field in fields], values)
+
+
 class JWTAuthentication(BaseAuthentication):
     def authenticate(self, request):
         auth = get_authorization_header(request).split()
 
-        if auth and len(auth) == 2:
-            token = auth[1].decode('utf-8')
-            id = decode_access_token(token)
+        # no credentials: let the other authentication classes or the permissions decide
+        if not auth:
+            return None
 
-            user = User.objects.get(pk=id)
+        if len(auth) == 2:
+            token = auth[1].decode('utf-8')
+            payload = decode_access_payload(token)
 
-            return (user, None)
+            # the user row is only loaded if the view needs more than the token claims
+            return (claims_user(payload), None)
 
         raise exceptions.AuthenticationFailed('unauthenticated')
 
 
-def create_access_token(id):
+def user_cache():
+    return caches[getattr(settings, 'JWT_USER_CACHE', 'default')]
+
+
+def user_cache_key(id):
+    return f'jwt-claims:{id}'
+
+
+def get_cached_user(id):
+    # short-lived cache of the token claims of users (never the password hash), invalidated on
+    # user save/delete (see user_app/signals.py)
+    timeout = getattr(settings, 'JWT_USER_CACHE_TIMEOUT', 60)
+    claims = user_cache().get(user_cache_key(id)) if timeout else None
+    if claims is None:
+        claims = User.objects.filter(pk=id).values('id', *ACCESS_TOKEN_CLAIMS).first()
+        if claims is None or not claims['is_active']:
+            raise exceptions.AuthenticationFailed('unauthenticated')
+        claims['user_id'] = claims.pop('id')
+        if timeout:
+            user_cache().set(user_cache_key(id), claims, timeout)
+    return claims_user(claims)
+
+
+def invalidate_cached_user(id):
+    user_cache().delete(user_cache_key(id))
+
+
+def create_access_token(user):
     return jwt.encode({
-        'user_id': id,
+        'user_id': user.id,
+        **{name: getattr(user, name) for name in ACCESS_TOKEN_CLAIMS},
         'exp': datetime.datetime.utcnow() + datetime.timedelta(seconds=30),
         'iat': datetime.datetime.utcnow()
     }, 'access_secret', algorithm='HS256')
 
 
-def decode_access_token(token):
+def decode_access_payload(token):
     try:
         payload = jwt.decode(token, 'access_secret', algorithms='HS256')
-
-        return payload['user_id']
+        payload['user_id']
+        return payload
     except:
         raise exceptions.AuthenticationFailed('unauthenticated')
 
 
+def decode_access_token(token):
+    return decode_access_payload(token)['user_id']
+
+
 def create_refresh_token(id):
     return jwt.encode({
         'user_id': id,
+        # unique per login, refresh tokens are stored by hash with a unique index
+        'jti': uuid.uuid4().hex,
         'exp': datetime.datetime.utcnow() + datetime.timedelta(days=7),
         'iat': datetime.datetime.utcnow()
     }, 'refresh_secret', algorithm='HS256')
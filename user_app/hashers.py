@@ -0,0 +1,134 @@
+import asyncio
+import base64
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.checks import Error, Tags, register
+
+"""
+    This file contains the password hashing policy:
+        - the hashers of the pbkdf2, scrypt and argon2 policies (argon2 needs the argon2-cffi package), whose cost
+          parameters are read from PASSWORD_HASH_COSTS, so they are tuned in the settings instead of subclassed again
+        - policy_hashers: PASSWORD_HASHERS with the hasher of a policy first, the others stay so hashes made
+          under another policy still verify
+        - verify_password: checks a password and, when its hash was made by another policy or with other costs,
+          returns a new hash that login views store (rehash on login)
+        - averify_password: verify_password in a bounded thread pool, for the async login view
+    Hashing is CPU bound and hashlib (like argon2-cffi) releases the GIL while it hashes, so the pool verifies
+    up to PASSWORD_HASH_WORKERS passwords in parallel. Under ASGI sync views run one at a time in a single thread,
+    where every login would wait for the hashes of the logins before it.
+"""
+
+
+def policy_hashers(policy):
+    # PASSWORD_HASHERS with the policy's hasher first
+    path = settings.PASSWORD_HASH_POLICIES[policy]
+    return [path, *(hasher for hasher in settings.PASSWORD_HASHERS if hasher != path)]
+
+
+def argon2_available():
+    try:
+        import argon2
+    except ImportError:
+        return False
+    return True
+
+
+def available_policies():
+    return [policy for policy in settings.PASSWORD_HASH_POLICIES if policy != 'argon2' or argon2_available()]
+
+
+@register(Tags.security)
+def check_password_hash_policy(app_configs, **kwargs):
+    if settings.PASSWORD_HASH_POLICY not in available_policies():
+        if settings.PASSWORD_HASH_POLICY in settings.PASSWORD_HASH_POLICIES:
+            hint = 'The argon2 policy needs the argon2-cffi package.'
+        else:
+            hint = f"The policies are {', '.join(settings.PASSWORD_HASH_POLICIES)}."
+        return [Error(
+            f'The password hash policy {settings.PASSWORD_HASH_POLICY} is not available.', hint=hint, id='user_app.E001',
+        )]
+    return []
+
+
+class Cost:
+    # a cost parameter of a policy's hasher, PASSWORD_HASH_COSTS[policy][name] or the default
+    def __init__(self, default):
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, hasher, owner):
+        costs = getattr(settings, 'PASSWORD_HASH_COSTS', {}).get(owner.policy, {})
+        return costs.get(self.name, self.default)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    policy = 'pbkdf2'
+    iterations = Cost(hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    policy = 'scrypt'
+    work_factor = Cost(hashers.ScryptPasswordHasher.work_factor)
+    block_size = Cost(hashers.ScryptPasswordHasher.block_size)
+    parallelism = Cost(hashers.ScryptPasswordHasher.parallelism)
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        # as Django's, but with the memory limit of the hash's own costs: scrypt uses 128 * n * r bytes,
+        # above OpenSSL's default limit of 32 MiB from n = 2 ** 15
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p, maxmem=256 * n * r, dklen=64)
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (self.algorithm, n, salt, r, p, hash_)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    policy = 'argon2'
+    time_cost = Cost(hashers.Argon2PasswordHasher.time_cost)
+    memory_cost = Cost(hashers.Argon2PasswordHasher.memory_cost)
+    parallelism = Cost(hashers.Argon2PasswordHasher.parallelism)
+
+
+def verify_password(password, encoded):
+    """
+    Returns (valid, new hash): the new hash is None unless the password is valid and its hash was not made
+    by the current policy with its current costs. Only hashes, so it runs in any thread.
+    """
+    if password is None or not hashers.is_password_usable(encoded):
+        return False, None
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False, None
+    preferred = hashers.get_hasher('default')
+    hasher_changed = hasher.algorithm != preferred.algorithm
+    must_update = hasher_changed or preferred.must_update(encoded)
+    valid = hasher.verify(password, encoded)
+    if not valid:
+        # as Django's check_password, a wrong password takes as long as a right one with an outdated hash
+        if not hasher_changed and must_update:
+            hasher.harden_runtime(password, encoded)
+        return False, None
+    return True, hashers.make_password(password) if must_update else None
+
+
+_executor = None
+
+
+def hash_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+    return _executor
+
+
+async def averify_password(password, encoded):
+    # logins above the pool size wait in its queue, hashing never takes more than PASSWORD_HASH_WORKERS threads
+    return await asyncio.get_running_loop().run_in_executor(hash_executor(), verify_password, password, encoded)
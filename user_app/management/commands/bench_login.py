@@ -0,0 +1,109 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+from django.urls import reverse
+
+from blog_app.benchmark import BENCH_PASSWORD, benchmark_settings, run_asgi, run_wsgi
+from blur.metrics import percentile
+from user_app.hashers import available_policies, policy_hashers, verify_password
+
+"""
+    This file contains the login throughput benchmark of the password hash policies (user_app/hashers.py).
+    For every policy, with its costs from PASSWORD_HASH_COSTS (or --cost):
+        - hashing: passwords verified per second by one thread (logins/sec per core, hashing being most of a
+          login) and by a pool of --workers threads, divided by the cores it may use
+        - with --endpoints, logins through the API in a test database: the sync view under WSGI and ASGI
+          and the async view under ASGI, --concurrency logins at once
+"""
+
+
+class Command(BaseCommand):
+    help = 'Measure password verifications and logins per second under each password hash policy.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', action='append', default=[], help='policy to measure (repeatable), all available by default')
+        parser.add_argument('--cost', action='append', default=[], help='cost of a policy, e.g. scrypt.work_factor=32768 (repeatable)')
+        parser.add_argument('--logins', type=int, default=40, help='verifications or logins per measure')
+        parser.add_argument('--workers', type=int, default=settings.PASSWORD_HASH_WORKERS, help='threads of the hashing pool')
+        parser.add_argument('--endpoints', action='store_true', help='also log in through the API, in a test database')
+        parser.add_argument('--concurrency', type=int, default=8, help='logins in flight through the API')
+
+    def handle(self, *args, **options):
+        policies = options['policy'] or available_policies()
+        for policy in policies:
+            if policy not in available_policies():
+                raise CommandError(f'Password hash policy {policy} is unknown or unavailable')
+        costs = {policy: dict(values) for policy, values in settings.PASSWORD_HASH_COSTS.items()}
+        for cost in options['cost']:
+            try:
+                name, value = cost.split('=')
+                policy, name = name.split('.')
+                costs.setdefault(policy, {})[name] = int(value)
+            except ValueError:
+                raise CommandError(f'Invalid cost {cost}, expected policy.name=value')
+        cores = min(options['workers'], os.cpu_count() or 1)
+
+        with override_settings(PASSWORD_HASH_COSTS=costs):
+            self.stdout.write(f"{'policy':<8} {'hash ms':>8} {'1 thread/s':>10} {'pool/s':>8} {'per core':>8}  costs")
+            for policy in policies:
+                with override_settings(PASSWORD_HASHERS=policy_hashers(policy)):
+                    single, pool = self.measure_hashing(options['logins'], options['workers'])
+                self.stdout.write(
+                    f'{policy:<8} {1000 / single:>8.1f} {single:>10.1f} {pool:>8.1f} {pool / cores:>8.1f}  '
+                    + ' '.join(f'{name}={value}' for name, value in costs.get(policy, {}).items())
+                )
+            if options['endpoints']:
+                self.measure_endpoints(policies, options)
+
+    def measure_hashing(self, logins, workers):
+        encoded = make_password(BENCH_PASSWORD)
+        verify_password(BENCH_PASSWORD, encoded)
+        start = time.perf_counter()
+        for _ in range(logins):
+            verify_password(BENCH_PASSWORD, encoded)
+        single = logins / (time.perf_counter() - start)
+        with ThreadPoolExecutor(workers) as pool:
+            start = time.perf_counter()
+            list(pool.map(verify_password, [BENCH_PASSWORD] * logins, [encoded] * logins))
+            pooled = logins / (time.perf_counter() - start)
+        return single, pooled
+
+    def measure_endpoints(self, policies, options):
+        runner = DiscoverRunner(verbosity=0)
+        runner.setup_test_environment()
+        databases = runner.setup_databases()
+        try:
+            with benchmark_settings():
+                wsgi, asgi = WSGIHandler(), ASGIHandler()
+                self.stdout.write(f"\n{'policy':<8} {'mode':<11} {'logins/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+                for policy in policies:
+                    with override_settings(PASSWORD_HASHERS=policy_hashers(policy)):
+                        username = f'bench-login-{policy}'
+                        User.objects.create_user(username, password=BENCH_PASSWORD)
+                        body = f'{{"username": "{username}", "password": "{BENCH_PASSWORD}"}}'.encode()
+                        runs = [
+                            ('wsgi', run_wsgi, wsgi, reverse('user_app:login')),
+                            ('asgi-sync', run_asgi, asgi, reverse('user_app:login')),
+                            ('asgi-async', run_asgi, asgi, reverse('user_app:async_login')),
+                        ]
+                        for mode, run, handler, path in runs:
+                            elapsed, latencies, errors = run(
+                                handler, path, options['logins'], options['concurrency'], method='POST',
+                                headers={'content-type': 'application/json'}, body=body,
+                            )
+                            self.stdout.write(
+                                f'{policy:<8} {mode:<11} {len(latencies) / elapsed:>8.1f} {percentile(latencies, 50):>8.1f} '
+                                f'{percentile(latencies, 95):>8.1f} {errors:>7}'
+                            )
+        finally:
+            runner.teardown_databases(databases)
+            runner.teardown_test_environment()
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from user_app.models import UserToken
+
+
+class Command(BaseCommand):
+    help = 'Delete expired refresh tokens in bounded batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='rows deleted per statement')
+        parser.add_argument('--pause', type=float, default=0, help='seconds to wait between batches')
+
+    def handle(self, *args, **options):
+        deleted = 0
+        while True:
+            # each batch is a short statement on the expiry index, so locks are held briefly
+            ids = list(UserToken.objects.expired().values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += UserToken.objects.filter(pk__in=ids).delete()[0]
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'{deleted} expired tokens deleted'))
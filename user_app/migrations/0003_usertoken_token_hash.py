@@ -0,0 +1,40 @@
+# Generated by Django 4.2.3 on 2026-10-18 21:23
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_tokens(apps, schema_editor):
+    # replaces raw refresh tokens by their SHA-256; copies of a token keep the one expiring last
+    UserToken = apps.get_model('user_app', 'UserToken')
+    seen, duplicates, batch = set(), [], []
+    for user_token in UserToken.objects.order_by('-expired_at', '-pk').only('pk', 'token').iterator(chunk_size=2000):
+        user_token.token_hash = hashlib.sha256(user_token.token.encode()).hexdigest()
+        if user_token.token_hash in seen:
+            duplicates.append(user_token.pk)
+            continue
+        seen.add(user_token.token_hash)
+        batch.append(user_token)
+        if len(batch) == 2000:
+            UserToken.objects.bulk_update(batch, ['token_hash'])
+            batch = []
+    UserToken.objects.bulk_update(batch, ['token_hash'])
+    for start in range(0, len(duplicates), 2000):
+        UserToken.objects.filter(pk__in=duplicates[start:start + 2000]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0002_alter_usertoken_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertoken',
+            name='token_hash',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.RunPython(hash_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.3 on 2026-10-18 21:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0003_usertoken_token_hash'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='usertoken',
+            name='token',
+        ),
+        migrations.AlterField(
+            model_name='usertoken',
+            name='token_hash',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='usertoken',
+            index=models.Index(fields=['user_id', 'expired_at'], name='user_token_user_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usertoken',
+            index=models.Index(fields=['expired_at'], name='user_token_expiry_idx'),
+        ),
+    ]
@@ -1,16 +1,56 @@
+import hashlib
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 # you should set max_length for CharFileds if you use Django<4 or SQLite
 
+
+def token_digest(token):
+    # refresh tokens are random and long, a plain SHA-256 is enough to keep them out of the database
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class UserTokenQuerySet(models.QuerySet):
+    def issue(self, user_id, token, expired_at):
+        # stores the token, then drops expired sessions of the user and the oldest ones above the limit
+        user_token = self.create(user_id=user_id, token_hash=token_digest(token), expired_at=expired_at)
+        sessions = self.filter(user_id=user_id)
+        sessions.filter(expired_at__lte=timezone.now()).delete()
+        limit = getattr(settings, 'MAX_SESSIONS_PER_USER', 10)
+        if limit:
+            oldest = sessions.order_by('-expired_at', '-pk').values_list('pk', flat=True)[limit:]
+            stale = list(oldest)
+            if stale:
+                self.filter(pk__in=stale).delete()
+        return user_token
+
+    def active(self, user_id, token):
+        return self.filter(token_hash=token_digest(token), user_id=user_id, expired_at__gt=timezone.now())
+
+    def revoke(self, token):
+        return self.filter(token_hash=token_digest(token)).delete()
+
+    def expired(self):
+        return self.filter(expired_at__lte=timezone.now())
+
+
 class UserToken(models.Model):
     user_id = models.IntegerField()
-    token = models.CharField() 
+    # SHA-256 of the refresh token, the raw token only lives in the client's cookie
+    token_hash = models.CharField(max_length=64, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     expired_at = models.DateTimeField()
 
+    objects = UserTokenQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = 'UserTokens'
+        indexes = [
+            models.Index(fields=['user_id', 'expired_at'], name='user_token_user_expiry_idx'),
+            models.Index(fields=['expired_at'], name='user_token_expiry_idx'),
+        ]
 
     def __str__(self) -> str:
-        return "User with id: " + str(self.user_id)  
-    
\ No newline at end of file
+        return "User with id: " + str(self.user_id)
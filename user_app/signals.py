@@ -0,0 +1,16 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+
+"""
+    This file contains the signal receivers of the user app:
+        - drop_cached_user: removes a changed or deleted user from the JWT user cache
+"""
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
@@ -1,12 +1,14 @@
 from user_app.views import *
+from user_app.async_views import AsyncLoginView
 from django.urls import path
 
 app_name = 'user_app'
 urlpatterns = [
-    path('auth/check', CheckUserExistsAPIView.as_view()),
-    path('auth/register', RegisterAPIView.as_view()),
-    path('auth/login', LoginAPIView.as_view()),
-    path('auth/verify', UserAPIView.as_view()),
-    path('auth/refresh', RefreshAPIView.as_view()),
-    path('auth/logout', LogoutAPIView.as_view()),
+    path('auth/check', CheckUserExistsAPIView.as_view(), name='check'),
+    path('auth/register', RegisterAPIView.as_view(), name='register'),
+    path('auth/login', LoginAPIView.as_view(), name='login'),
+    path('auth/verify', UserAPIView.as_view(), name='verify'),
+    path('auth/refresh', RefreshAPIView.as_view(), name='refresh'),
+    path('auth/logout', LogoutAPIView.as_view(), name='logout'),
+    path('auth/async/login', AsyncLoginView.as_view(), name='async_login'),
 ]
\ No newline at end of file
@@ -1,9 +1,12 @@
 import datetime
 from rest_framework import exceptions
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .authentication import create_access_token, JWTAuthentication, create_refresh_token, decode_refresh_token
+from .authentication import create_access_token, JWTAuthentication, create_refresh_token, decode_refresh_token, get_cached_user
 from django.contrib.auth.models import User
+from django.utils import timezone
+from .hashers import verify_password
 from .serializers import UserSerializer
 from user_app.models import UserToken
 
@@ -61,15 +64,16 @@ class LoginAPIView(APIView):
         user = User.objects.filter(username=username).first()
         if user is None:
             raise exceptions.AuthenticationFailed('Invalid username')
-        if not user.check_password(password):
+        valid, rehashed = verify_password(password, user.password)
+        if not valid:
             raise exceptions.AuthenticationFailed('Invalid password')
-        access_token = create_access_token(user.id)
+        if rehashed:
+            # the hash was made by another policy or with other costs
+            user.password = rehashed
+            user.save(update_fields=['password'])
+        access_token = create_access_token(user)
         refresh_token = create_refresh_token(user.id)
-        UserToken.objects.create(
-            user_id = user.id,
-            token = refresh_token,
-            expired_at = datetime.datetime.now() + datetime.timedelta(days=7)
-        )
+        UserToken.objects.issue(user.id, refresh_token, timezone.now() + datetime.timedelta(days=7))
         response = Response()
         response.set_cookie(key='refresh_token', value=refresh_token, httponly=True)
         response.data = {
@@ -80,6 +84,7 @@ class LoginAPIView(APIView):
 
 class UserAPIView(APIView):
     authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
     """
     This view returns the user info as verified by the JWTAuthentication class.
     request data: 
@@ -104,13 +109,9 @@ class RefreshAPIView(APIView):
     def post(self, request):
         refresh_token = request.COOKIES.get('refresh_token')
         id = decode_refresh_token(refresh_token)
-        if not UserToken.objects.filter(
-                user_id=id,
-                token=refresh_token,
-                expired_at__gt=datetime.datetime.now(tz=datetime.timezone.utc)
-        ).exists():
+        if not UserToken.objects.active(id, refresh_token).exists():
             raise exceptions.AuthenticationFailed('unauthenticated')
-        access_token = create_access_token(id)
+        access_token = create_access_token(get_cached_user(id))
         return Response({
             'token': access_token
         })
@@ -127,7 +128,8 @@ class LogoutAPIView(APIView):
     """
     def post(self, request):
         refresh_token = request.COOKIES.get('refresh_token')
-        UserToken.objects.filter(token=refresh_token).delete()
+        if refresh_token:
+            UserToken.objects.revoke(refresh_token)
 
         response = Response()
         response.delete_cookie(key='refresh_token')